@@ -1,26 +1,382 @@
+import argparse
+import hashlib
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Dict, Any
+import math
+import os
+import signal
+import socket
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Iterable, Iterator, Optional, List
+from urllib.parse import parse_qs, urlsplit
 
-from mnemosyne_app import run_ingest, run_answer
-from thinking_sessions import run_thinking_session
-from memory_store import load_memories
+from mnemosyne_app import run_ingest, run_answer, run_answer_batch, load_memories_for_question
+from thinking_sessions import run_thinking_session, run_thinking_session_batch
+from memory_store import load_memories_cached, load_memories_pruned, store_generation
+from mnemosyne_engine import stream_answer_query, iter_answer_events
 from analytics import build_belief_graph, build_timeline
+from ingest_queue import IngestQueue, DEFAULT_WAL
+from partitioned_store import is_partitioned_store
+from store_index import indexed_timeline, list_topics
+from dedup import DEDUP_POLICIES
+from change_feed import changes_size, parse_cursor, wait_for_changes
+from replica import StoreReplica
+from metrics import observe, render_prometheus
+from profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    DEFAULT_PROFILE_DIR,
+    DEFAULT_MIN_INTERVAL,
+    RequestProfiler,
+    new_profile_id,
+    profile_requested,
+)
 
 
 DEFAULT_STORE = "data/memories.json"
+COMPRESSION_MIN_BYTES = 1024
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+SUPPORTED_ENCODINGS = ["gzip", "deflate"]
+LONG_POLL_SECONDS = 25.0
+MAX_LONG_POLL_SECONDS = 60.0
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_MAX_SECONDS = 300.0
+SSE_RETRY_MS = 2000
+MAX_TOPICS_PAGE = 500
+WRITE_ENDPOINTS = ["/ingest", "/session", "/session/batch"]
+ENDPOINTS = [
+    "/ingest",
+    "/answer",
+    "/answer/batch",
+    "/session",
+    "/session/batch",
+    "/graph",
+    "/timeline",
+    "/topics",
+    "/changes",
+    "/jobs",
+    "/replication",
+    "/stats",
+    "/metrics",
+]
+OTHER_ENDPOINT = "other"
+MAX_REQUEST_WORKERS = os.cpu_count() or 1
+
+_byte_counters: Dict[str, Dict[str, int]] = {}
+_byte_counters_lock = threading.Lock()
+_default_profiler = RequestProfiler()
+
+
+def record_bytes(endpoint: str, **counts: int) -> None:
+    with _byte_counters_lock:
+        counters = _byte_counters.setdefault(
+            endpoint,
+            {
+                "requests": 0,
+                "request_bytes_received": 0,
+                "request_bytes_decoded": 0,
+                "response_bytes_raw": 0,
+                "response_bytes_sent": 0,
+                "not_modified": 0,
+            },
+        )
+        for key, value in counts.items():
+            counters[key] += value
+
+
+def byte_counters() -> Dict[str, Dict[str, int]]:
+    with _byte_counters_lock:
+        return {endpoint: dict(counters) for endpoint, counters in _byte_counters.items()}
+
+
+def http_counters() -> Dict[str, Dict[str, Dict[str, int]]]:
+    counters: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for endpoint, values in byte_counters().items():
+        for key, value in values.items():
+            counters.setdefault(f"http_{key}", {"endpoint": {}})["endpoint"][endpoint] = value
+    return counters
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        name = fields[0].strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in fields[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    best = None
+    best_weight = 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best = encoding
+            best_weight = weight
+    return best
+
+
+def compressor_for(encoding: str) -> Any:
+    if encoding == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    return zlib.compressobj(6, zlib.DEFLATED, 15)
+
+
+def decompress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(31)
+    elif body[:1] == b"\x78":
+        decompressor = zlib.decompressobj(15)
+    else:
+        decompressor = zlib.decompressobj(-15)
+    data = decompressor.decompress(body, MAX_REQUEST_BYTES + 1)
+    if len(data) > MAX_REQUEST_BYTES:
+        raise ValueError("Decompressed request body is too large.")
+    return data
+
+
+def endpoint_label(path: str) -> str:
+    path = path.split("?", 1)[0]
+    if path.startswith("/jobs/"):
+        return "/jobs"
+    return path if path in ENDPOINTS else OTHER_ENDPOINT
+
+
+def request_workers(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("Field 'workers' must be an integer.")
+    return min(max(int(value or 0), 0), MAX_REQUEST_WORKERS)
+
+
+def long_poll_timeout(value: Optional[str]) -> float:
+    timeout = float(value or LONG_POLL_SECONDS)
+    if not math.isfinite(timeout):
+        raise ValueError("Parameter 'timeout' must be finite.")
+    return min(max(timeout, 0.0), MAX_LONG_POLL_SECONDS)
+
+
+def compute_etag(
+    store_path: str,
+    endpoint: str,
+    params: Dict[str, Any],
+    generation: Optional[str] = None,
+) -> str:
+    generation = generation or store_generation(store_path)
+    key = json.dumps([generation, store_path, endpoint, params], sort_keys=True, default=str)
+    return 'W/"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates: List[str] = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in candidates:
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
 
 
 class MnemosyneHandler(BaseHTTPRequestHandler):
-    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
-        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    _profiling = False
+    _profile: Optional[Any] = None
+    _profile_id: Optional[str] = None
+    _profile_report: Optional[Dict[str, Any]] = None
+
+    def _endpoint(self) -> str:
+        return endpoint_label(self.path)
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
+        if self._profiling:
+            payload = dict(payload, profile=self._finish_profile())
+        replica = self._replica()
+        if replica is not None:
+            payload = dict(payload, replication=replica.lag())
+        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send_body(raw, "application/json; charset=utf-8", status=status, headers=headers)
+
+    def _send_body(
+        self,
+        raw: bytes,
+        content_type: str,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = raw
+        encoding = None
+        if len(raw) >= COMPRESSION_MIN_BYTES:
+            encoding = choose_encoding(self.headers.get("Accept-Encoding"))
+        if encoding is not None:
+            compressor = compressor_for(encoding)
+            body = compressor.compress(raw) + compressor.flush()
         self.send_response(status)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        for name, value in dict(headers or {}, **self._extra_headers()).items():
+            self.send_header(name, value)
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
+        record_bytes(self._endpoint(), response_bytes_raw=len(raw), response_bytes_sent=len(body))
+
+    def _send_stream(
+        self,
+        chunks: Iterable[str],
+        content_type: str,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        encoding = choose_encoding(self.headers.get("Accept-Encoding"))
+        compressor = compressor_for(encoding) if encoding is not None else None
+        chunked = self.request_version >= "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        for name, value in dict(headers or {}, **self._extra_headers()).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        raw_total = 0
+        sent_total = 0
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            raw_total += len(data)
+            if compressor is not None and data:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            sent_total += self._write_chunk(data, chunked)
+        if compressor is not None:
+            sent_total += self._write_chunk(compressor.flush(), chunked)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        self._finish_profile()
+        record_bytes(self._endpoint(), response_bytes_raw=raw_total, response_bytes_sent=sent_total)
+
+    def _write_chunk(self, data: bytes, chunked: bool) -> int:
+        if not data:
+            return 0
+        if chunked:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        else:
+            self.wfile.write(data)
+        self.wfile.flush()
+        return len(data)
+
+    def _check_etag(self, store_path: str, data: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        replica = self._replica()
+        generation = replica.generation() if replica is not None else None
+        etag = compute_etag(store_path, self._endpoint(), data, generation=generation)
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            record_bytes(self._endpoint(), not_modified=1)
+            return None
+        return {"ETag": etag, "Cache-Control": "no-cache"}
+
+    def _request_profiler(self) -> RequestProfiler:
+        return getattr(self.server, "request_profiler", None) or _default_profiler
+
+    def _start_profile(self) -> None:
+        self._profiling = True
+        profiler, error = self._request_profiler().start()
+        if profiler is None:
+            self._profile_report = {"error": error}
+            return
+        self._profile = profiler
+        self._profile_id = new_profile_id()
+
+    def _finish_profile(self) -> Optional[Dict[str, Any]]:
+        if self._profile is not None:
+            profiler = self._profile
+            self._profile = None
+            label = f"{self.command} {self._endpoint()}"
+            self._profile_report = self._request_profiler().finish(profiler, self._profile_id or "", label)
+        return self._profile_report
+
+    def _replica(self) -> Optional[StoreReplica]:
+        return getattr(self.server, "replica", None)
+
+    def _extra_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self._profiling:
+            if self._profile_id is not None:
+                headers[PROFILE_ID_HEADER] = self._profile_id
+            else:
+                headers[PROFILE_HEADER] = "skipped"
+        replica = self._replica()
+        if replica is not None:
+            lag = replica.lag()
+            headers["X-Replication-Lag-Seconds"] = f"{lag['replication_lag_seconds']:.3f}"
+            headers["X-Replication-Lag-Bytes"] = str(lag["replication_lag_bytes"])
+        return headers
+
+    def _dispatch(self, route: Any) -> None:
+        started = time.perf_counter()
+        if profile_requested(self.headers.get(PROFILE_HEADER), self.path):
+            self._start_profile()
+        try:
+            route()
+        finally:
+            self._finish_profile()
+            observe("http_request_seconds", time.perf_counter() - started, endpoint=self._endpoint(), method=self.command)
+
+    def do_GET(self) -> None:
+        self._dispatch(self._route_get)
 
     def do_POST(self) -> None:
+        self._dispatch(self._route_post)
+
+    def _route_get(self) -> None:
+        endpoint = self._endpoint()
+        record_bytes(endpoint, requests=1)
+        if endpoint == "/stats":
+            self._send_json({"endpoints": byte_counters()}, status=200)
+        elif endpoint == "/metrics":
+            self._send_body(
+                render_prometheus(http_counters()).encode("utf-8"),
+                "text/plain; version=0.0.4; charset=utf-8",
+            )
+        elif endpoint == "/changes":
+            self._handle_changes()
+        elif endpoint == "/topics":
+            self._handle_topics()
+        elif endpoint == "/replication":
+            replica = self._replica()
+            if replica is None:
+                self._send_json({"error": "This server is not a follower."}, status=404)
+            else:
+                self._send_json({"role": "follower", "store": replica.store_path}, status=200)
+        elif endpoint == "/jobs":
+            self._handle_job_status(self.path.split("?", 1)[0][len("/jobs/"):])
+        else:
+            self._send_json({"error": "Unknown endpoint."}, status=404)
+
+    def _route_post(self) -> None:
         length_header = self.headers.get("Content-Length")
         if length_header is None:
             self._send_json({"error": "Missing Content-Length header."}, status=400)
@@ -31,21 +387,53 @@ class MnemosyneHandler(BaseHTTPRequestHandler):
             self._send_json({"error": "Invalid Content-Length header."}, status=400)
             return
         body_bytes = self.rfile.read(length)
+        record_bytes(self._endpoint(), requests=1, request_bytes_received=len(body_bytes))
+        content_encoding = (self.headers.get("Content-Encoding") or "identity").strip().lower()
+        if content_encoding in SUPPORTED_ENCODINGS:
+            try:
+                body_bytes = decompress_body(body_bytes, content_encoding)
+            except zlib.error:
+                self._send_json({"error": "Invalid compressed body."}, status=400)
+                return
+            except ValueError as exc:
+                self._send_json({"error": str(exc)}, status=413)
+                return
+        elif content_encoding != "identity":
+            self._send_json({"error": "Unsupported Content-Encoding."}, status=415)
+            return
+        record_bytes(self._endpoint(), request_bytes_decoded=len(body_bytes))
         try:
             data = json.loads(body_bytes.decode("utf-8"))
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             self._send_json({"error": "Invalid JSON body."}, status=400)
             return
 
-        if self.path == "/ingest":
+        endpoint = self._endpoint()
+        replica = self._replica()
+        if replica is not None:
+            if endpoint in WRITE_ENDPOINTS:
+                self._send_json(
+                    {"error": "This server is a read-only follower; send writes to the primary."},
+                    status=403,
+                )
+                return
+            if (data.get("store") or replica.store_path) != replica.store_path:
+                self._send_json({"error": f"This follower only serves store '{replica.store_path}'."}, status=400)
+                return
+            data.setdefault("store", replica.store_path)
+        if endpoint == "/ingest":
             self._handle_ingest(data)
-        elif self.path == "/answer":
+        elif endpoint == "/answer":
             self._handle_answer(data)
-        elif self.path == "/session":
+        elif endpoint == "/answer/batch":
+            self._handle_answer_batch(data)
+        elif endpoint == "/session":
             self._handle_session(data)
-        elif self.path == "/graph":
+        elif endpoint == "/session/batch":
+            self._handle_session_batch(data)
+        elif endpoint == "/graph":
             self._handle_graph(data)
-        elif self.path == "/timeline":
+        elif endpoint == "/timeline":
             self._handle_timeline(data)
         else:
             self._send_json({"error": "Unknown endpoint."}, status=404)
@@ -56,20 +444,192 @@ class MnemosyneHandler(BaseHTTPRequestHandler):
         timestamp = data.get("timestamp") or ""
         store_path = data.get("store") or DEFAULT_STORE
         profile = data.get("profile") or "default"
+        dedup = data.get("dedup") or "off"
         if not text or not source:
             self._send_json({"error": "Fields 'text' and 'source' are required."}, status=400)
             return
-        summary = run_ingest(text, source, timestamp, store_path, profile=profile)
+        if dedup not in DEDUP_POLICIES:
+            self._send_json({"error": "Field 'dedup' must be one of: " + ", ".join(DEDUP_POLICIES) + "."}, status=400)
+            return
+        if data.get("async"):
+            queue = getattr(self.server, "ingest_queue", None)
+            if queue is None:
+                self._send_json({"error": "Asynchronous ingest is not enabled."}, status=503)
+                return
+            job_id = queue.submit(
+                {
+                    "text": text,
+                    "source": source,
+                    "timestamp": timestamp,
+                    "store": store_path,
+                    "profile": profile,
+                    "dedup": dedup,
+                }
+            )
+            self._send_json({"job_id": job_id, "status": "queued"}, status=202)
+            return
+        summary = run_ingest(
+            text,
+            source,
+            timestamp,
+            store_path,
+            profile=profile,
+            dedup=dedup,
+            timings=bool(data.get("timings")),
+        )
         self._send_json(summary, status=200)
 
+    def _query(self) -> Dict[str, str]:
+        return {key: values[-1] for key, values in parse_qs(urlsplit(self.path).query).items()}
+
+    def _handle_topics(self) -> None:
+        query = self._query()
+        replica = self._replica()
+        store_path = query.get("store") or (replica.store_path if replica is not None else DEFAULT_STORE)
+        if replica is not None and store_path != replica.store_path:
+            self._send_json({"error": f"This follower only serves store '{replica.store_path}'."}, status=400)
+            return
+        order = query.get("order") or "desc"
+        if order not in ["asc", "desc"]:
+            self._send_json({"error": "Parameter 'order' must be 'asc' or 'desc'."}, status=400)
+            return
+        try:
+            offset = max(int(query.get("offset") or 0), 0)
+            limit = min(max(int(query.get("limit") or 50), 1), MAX_TOPICS_PAGE)
+        except ValueError:
+            self._send_json({"error": "Parameters 'offset' and 'limit' must be integers."}, status=400)
+            return
+        options = {
+            "sort": query.get("sort") or "count",
+            "descending": order == "desc",
+            "offset": offset,
+            "limit": limit,
+            "prefix": query.get("prefix") or "",
+        }
+        headers = self._check_etag(store_path, dict(options, store=store_path))
+        if headers is None:
+            return
+        try:
+            if replica is not None:
+                result = replica.list_topics(**options)
+            else:
+                result = list_topics(store_path, **options)
+        except ValueError as exc:
+            self._send_json({"error": str(exc)}, status=400)
+            return
+        self._send_json(result, status=200, headers=headers)
+
+    def _snapshot_cursor(self, store_path: str) -> int:
+        replica = self._replica()
+        return replica.cursor if replica is not None else changes_size(store_path)
+
+    def _handle_changes(self) -> None:
+        query = self._query()
+        store_path = query.get("store") or DEFAULT_STORE
+        try:
+            cursor = parse_cursor(self.headers.get("Last-Event-ID") or query.get("cursor"), store_path)
+            timeout = long_poll_timeout(query.get("timeout"))
+        except ValueError:
+            self._send_json({"error": "Parameters 'cursor' and 'timeout' must be finite numbers."}, status=400)
+            return
+        if "text/event-stream" not in (self.headers.get("Accept") or ""):
+            events, cursor = wait_for_changes(store_path, cursor, timeout)
+            self._send_json({"events": events, "cursor": cursor}, status=200)
+            return
+        try:
+            self._send_stream(
+                self._iter_change_stream(store_path, cursor),
+                "text/event-stream; charset=utf-8",
+                headers={"Cache-Control": "no-cache"},
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _iter_change_stream(self, store_path: str, cursor: int) -> Iterator[str]:
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        yield f"retry: {SSE_RETRY_MS}\nid: {cursor}\nevent: ready\ndata: {json.dumps({'cursor': cursor})}\n\n"
+        while time.monotonic() < deadline:
+            events, cursor = wait_for_changes(store_path, cursor, SSE_HEARTBEAT_SECONDS)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(
+                f"id: {e['cursor']}\nevent: {e['type']}\ndata: {json.dumps(e, ensure_ascii=False)}\n\n"
+                for e in events
+            )
+
+    def _handle_job_status(self, job_id: str) -> None:
+        queue = getattr(self.server, "ingest_queue", None)
+        job = queue.status(job_id) if queue is not None else None
+        if job is None:
+            self._send_json({"error": "Unknown job."}, status=404)
+            return
+        self._send_json(job, status=200)
+
     def _handle_answer(self, data: Dict[str, Any]) -> None:
         question = data.get("question")
         store_path = data.get("store") or DEFAULT_STORE
         if not question:
             self._send_json({"error": "Field 'question' is required."}, status=400)
             return
-        result = run_answer(question, store_path)
-        self._send_json(result, status=200)
+        output_format = data.get("format") or "text"
+        if output_format not in ["text", "json"]:
+            self._send_json({"error": "Field 'format' must be 'text' or 'json'."}, status=400)
+            return
+        headers = self._check_etag(store_path, data)
+        if headers is None:
+            return
+        replica = self._replica()
+        if data.get("stream"):
+            if replica is not None:
+                memories = replica.snapshot()[0]
+            else:
+                memories = load_memories_for_question(question, store_path)
+            if output_format == "json":
+                events = iter_answer_events(memories, question)
+                self._send_stream(
+                    (json.dumps(e, ensure_ascii=False) + "\n" for e in events),
+                    "application/x-ndjson",
+                    headers=headers,
+                )
+            else:
+                self._send_stream(stream_answer_query(memories, question), "text/plain; charset=utf-8", headers=headers)
+            return
+        if replica is not None:
+            result = replica.answer(question, output_format=output_format)
+        else:
+            result = run_answer(question, store_path, output_format=output_format, timings=bool(data.get("timings")))
+        self._send_json(result, status=200, headers=headers)
+
+    def _handle_answer_batch(self, data: Dict[str, Any]) -> None:
+        questions = data.get("questions")
+        store_path = data.get("store") or DEFAULT_STORE
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q for q in questions):
+            self._send_json({"error": "Field 'questions' must be a non-empty list of strings."}, status=400)
+            return
+        output_format = data.get("format") or "text"
+        if output_format not in ["text", "json"]:
+            self._send_json({"error": "Field 'format' must be 'text' or 'json'."}, status=400)
+            return
+        try:
+            workers = request_workers(data.get("workers"))
+        except (TypeError, ValueError):
+            self._send_json({"error": "Field 'workers' must be an integer."}, status=400)
+            return
+        headers = self._check_etag(store_path, data)
+        if headers is None:
+            return
+        replica = self._replica()
+        if replica is not None:
+            result = replica.answer_batch(questions, output_format=output_format)
+        else:
+            result = run_answer_batch(
+                questions,
+                store_path,
+                output_format=output_format,
+                workers=workers,
+            )
+        self._send_json(result, status=200, headers=headers)
 
     def _handle_session(self, data: Dict[str, Any]) -> None:
         topic = data.get("topic")
@@ -82,25 +642,223 @@ class MnemosyneHandler(BaseHTTPRequestHandler):
         result = run_thinking_session(topic, store_path, start_iso=start, end_iso=end)
         self._send_json(result, status=200)
 
+    def _handle_session_batch(self, data: Dict[str, Any]) -> None:
+        topics = data.get("topics")
+        since = data.get("since")
+        store_path = data.get("store") or DEFAULT_STORE
+        if not topics and not since:
+            self._send_json({"error": "Field 'topics' or 'since' is required."}, status=400)
+            return
+        if topics is not None and not isinstance(topics, list):
+            self._send_json({"error": "Field 'topics' must be a list."}, status=400)
+            return
+        try:
+            workers = request_workers(data.get("workers"))
+        except (TypeError, ValueError):
+            self._send_json({"error": "Field 'workers' must be an integer."}, status=400)
+            return
+        result = run_thinking_session_batch(
+            topics,
+            store_path,
+            start_iso=data.get("start"),
+            end_iso=data.get("end"),
+            since_iso=since,
+            workers=workers,
+        )
+        self._send_json(result, status=200)
+
     def _handle_graph(self, data: Dict[str, Any]) -> None:
         store_path = data.get("store") or DEFAULT_STORE
-        memories = load_memories(store_path)
+        headers = self._check_etag(store_path, data)
+        if headers is None:
+            return
+        replica = self._replica()
+        cursor = self._snapshot_cursor(store_path)
+        memories = replica.snapshot()[0] if replica is not None else load_memories_cached(store_path)
         contradictions = data.get("contradictions") or []
         graph = build_belief_graph(memories, contradictions)
-        self._send_json(graph, status=200)
+        self._send_json(dict(graph, cursor=cursor), status=200, headers=headers)
 
     def _handle_timeline(self, data: Dict[str, Any]) -> None:
         store_path = data.get("store") or DEFAULT_STORE
         topic = data.get("topic") or ""
-        memories = load_memories(store_path)
-        timeline = build_timeline(memories, topic=topic)
-        self._send_json({"items": timeline}, status=200)
+        headers = self._check_etag(store_path, data)
+        if headers is None:
+            return
+        replica = self._replica()
+        cursor = self._snapshot_cursor(store_path)
+        if replica is not None:
+            timeline = replica.timeline(topic)
+        elif is_partitioned_store(store_path):
+            memories = load_memories_pruned(store_path, topic=topic or None)
+            timeline = build_timeline(memories, topic=topic)
+        else:
+            timeline = indexed_timeline(store_path, topic)
+        self._send_json({"items": timeline, "cursor": cursor}, status=200, headers=headers)
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    profiler: Optional[RequestProfiler] = None,
+    handler_class: type = MnemosyneHandler,
+) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.request_profiler = profiler
+    return server
+
+
+def start_services(
+    server: ThreadingHTTPServer,
+    wal_path: str,
+    follow: Optional[str] = None,
+    jobs_dir: Optional[str] = None,
+) -> None:
+    if follow:
+        server.replica = StoreReplica(follow).start()
+        return
+    queue = IngestQueue(wal_path, jobs_dir=jobs_dir)
+    queue.start()
+    server.ingest_queue = queue
+
+
+def stop_services(server: ThreadingHTTPServer) -> None:
+    replica = getattr(server, "replica", None)
+    if replica is not None:
+        replica.stop()
+    queue = getattr(server, "ingest_queue", None)
+    if queue is not None:
+        queue.stop()
+
+
+def _serve(
+    server: ThreadingHTTPServer,
+    wal_path: str,
+    follow: Optional[str],
+    jobs_dir: Optional[str] = None,
+) -> None:
+    start_services(server, wal_path, follow, jobs_dir=jobs_dir)
+    try:
+        server.serve_forever()
+    finally:
+        stop_services(server)
+
+
+def serve_on_socket(
+    sock: socket.socket,
+    wal_path: str,
+    profiler: Optional[RequestProfiler] = None,
+    follow: Optional[str] = None,
+    jobs_dir: Optional[str] = None,
+) -> None:
+    server = ThreadingHTTPServer(sock.getsockname()[:2], MnemosyneHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    host, port = sock.getsockname()[:2]
+    server.server_name = socket.getfqdn(host)
+    server.server_port = port
+    server.request_profiler = profiler
+    _serve(server, wal_path, follow, jobs_dir=jobs_dir)
+
+
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    wal_path: str = DEFAULT_WAL,
+    profiler: Optional[RequestProfiler] = None,
+    follow: Optional[str] = None,
+) -> None:
+    _serve(create_server(host, port, profiler=profiler), wal_path, follow)
+
+
+def run_prefork_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 4,
+    wal_path: str = DEFAULT_WAL,
+    profiler: Optional[RequestProfiler] = None,
+    follow: Optional[str] = None,
+) -> None:
+    if not hasattr(os, "fork") or workers <= 1:
+        run_server(host, port, wal_path=wal_path, profiler=profiler, follow=follow)
+        return
+    sock = socket.create_server((host, port), backlog=128)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 0
+            try:
+                serve_on_socket(
+                    sock,
+                    f"{wal_path}.{index}",
+                    profiler=profiler,
+                    follow=follow,
+                    jobs_dir=wal_path + ".jobs",
+                )
+            except BaseException:
+                status = 1
+            os._exit(status)
+        children[pid] = index
+
+    def shutdown(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for index in range(workers):
+        spawn(index)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            time.sleep(0.1)
+            spawn(index)
+    sock.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--wal", default=DEFAULT_WAL)
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_MIN_INTERVAL)
+    parser.add_argument("--follow", default=None, metavar="STORE")
+    return parser
 
 
-def run_server(host: str = "127.0.0.1", port: int = 8000) -> None:
-    server = HTTPServer((host, port), MnemosyneHandler)
-    server.serve_forever()
+def main() -> None:
+    args = build_parser().parse_args()
+    profiler = RequestProfiler(output_dir=args.profile_dir or None, min_interval=args.profile_interval)
+    if args.workers > 1:
+        run_prefork_server(
+            args.host,
+            args.port,
+            workers=args.workers,
+            wal_path=args.wal,
+            profiler=profiler,
+            follow=args.follow,
+        )
+    else:
+        run_server(args.host, args.port, wal_path=args.wal, profiler=profiler, follow=args.follow)
 
 
 if __name__ == "__main__":
-    run_server()
+    main()
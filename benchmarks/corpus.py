@@ -0,0 +1,120 @@
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+
+TOPICS = [
+    "rag", "agents", "memory", "search", "embeddings", "privacy", "health", "running",
+    "sleep", "finance", "investing", "writing", "reading", "music", "travel", "cooking",
+    "python", "rust", "databases", "startups", "career", "family", "friends", "meditation",
+    "productivity", "design", "teaching", "learning", "history", "philosophy", "climate", "energy",
+]
+OPENERS = {
+    "belief": ["I believe", "I think", "I feel", "I assume"],
+    "decision": ["I decided", "I will", "I plan", "I intend"],
+    "reflection": ["I realized", "I noticed", "I reflected that"],
+    "fact": ["Today", "This week", "Yesterday"],
+}
+CLAIMS = [
+    "{a} matters more than {b}",
+    "{a} is the future of {b}",
+    "{a} works well together with {b}",
+    "{a} deserves more time than {b}",
+    "{a} is overrated compared to {b}",
+    "spending time on {a} improves {b}",
+]
+TYPE_WEIGHTS = [("belief", 0.45), ("decision", 0.2), ("reflection", 0.15), ("fact", 0.2)]
+
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 42, start: Optional[datetime] = None) -> None:
+        self.rng = random.Random(seed)
+        self.start = start or datetime(2024, 1, 1)
+        self.topic_weights = [1.0 / (rank + 1) for rank in range(len(TOPICS))]
+        self.counter = 0
+
+    def topic(self) -> str:
+        return self.rng.choices(TOPICS, weights=self.topic_weights)[0]
+
+    def memory_type(self) -> str:
+        return self.rng.choices([t for t, _ in TYPE_WEIGHTS], weights=[w for _, w in TYPE_WEIGHTS])[0]
+
+    def sentence(self, memory_type: str, a: str, b: str) -> str:
+        claim = self.rng.choice(CLAIMS).format(a=a, b=b)
+        return f"{self.rng.choice(OPENERS[memory_type])} {claim}."
+
+    def next_id(self) -> str:
+        self.counter += 1
+        return f"bench-{self.counter:08d}"
+
+    def memories(
+        self,
+        count: int,
+        revision_rate: float = 0.08,
+        contradiction_rate: float = 0.05,
+        span_days: int = 730,
+    ) -> List[Dict[str, Any]]:
+        step = timedelta(days=span_days) / max(count, 1)
+        memories: List[Dict[str, Any]] = []
+        by_topic: Dict[str, List[int]] = {}
+        claims: List[str] = []
+        for i in range(count):
+            created_at = self.start + step * i
+            a = self.topic()
+            b = self.topic()
+            memory_type = self.memory_type()
+            claim = self.rng.choice(CLAIMS).format(a=a, b=b)
+            content = f"{self.rng.choice(OPENERS[memory_type])} {claim}."
+            revision_of = None
+            roll = self.rng.random()
+            previous = by_topic.get(a)
+            if previous and roll < revision_rate:
+                target = self.rng.choice(previous[-50:])
+                revision_of = memories[target]["memory_id"]
+                claim = claims[target]
+                content = f"I no longer think {claim}; now I see it differently."
+                memory_type = "belief"
+            elif roll < revision_rate + contradiction_rate:
+                claim = f"{a} matters more than {b}"
+                content = f"I do not think {claim}."
+                memory_type = "belief"
+            topics = [a] if a == b else [a, b]
+            memory = {
+                "memory_id": self.next_id(),
+                "content": content,
+                "created_at": created_at.isoformat(),
+                "memory_type": memory_type,
+                "confidence": round(self.rng.uniform(0.4, 0.95), 2),
+                "source": self.rng.choice(["note", "chat", "tweet", "voice", "pdf"]),
+                "topic": topics,
+                "revision_of": revision_of,
+            }
+            by_topic.setdefault(a, []).append(i)
+            claims.append(claim)
+            memories.append(memory)
+        return memories
+
+    def raw_text(self, sentences: int = 8) -> str:
+        parts = []
+        for _ in range(sentences):
+            memory_type = self.memory_type()
+            parts.append(self.sentence(memory_type, self.topic(), self.topic()))
+        if sentences > 1:
+            parts[-1] = f"I no longer believe {self.topic()} is the future of {self.topic()}."
+        return " ".join(parts)
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier = 1000
+        value = value[:-1]
+    elif value.endswith("m"):
+        multiplier = 1000000
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def generate_memories(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    return CorpusGenerator(seed).memories(count)
@@ -0,0 +1,306 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(bench_dir)
+for path in [root_dir, bench_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from corpus import CorpusGenerator
+from api_server import MnemosyneHandler, create_server, start_services, stop_services
+from memory_store import save_memories
+
+
+DEFAULT_MIX = "ingest=1,answer=6,session=1,graph=1,timeline=1"
+ENDPOINTS = ["ingest", "answer", "session", "graph", "timeline"]
+REQUEST_TIMEOUT = 60.0
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix; expected one of {', '.join(ENDPOINTS)}.")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Mix must give at least one endpoint a positive weight.")
+    return mix
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class RequestFactory:
+    def __init__(self, store_path: str, seed: int, async_ingest: bool = False) -> None:
+        self.store_path = store_path
+        self.seed = seed
+        self.async_ingest = async_ingest
+
+    def build(self, endpoint: str, rng: random.Random, gen: CorpusGenerator) -> Tuple[str, Dict[str, Any]]:
+        topic = gen.topic()
+        if endpoint == "ingest":
+            body: Dict[str, Any] = {
+                "text": gen.raw_text(sentences=rng.randint(2, 6)),
+                "source": rng.choice(["note", "chat", "tweet", "voice"]),
+                "store": self.store_path,
+            }
+            if self.async_ingest:
+                body["async"] = True
+            return "/ingest", body
+        if endpoint == "answer":
+            question = rng.choice(
+                [
+                    f"What do I believe about {topic}?",
+                    f"What did I believe about {topic} as of 2024-06-30?",
+                    f"How did my view of {topic} change from 2024-01-01 to 2024-12-31?",
+                    f"What did I think about {topic} before?",
+                ]
+            )
+            return "/answer", {"question": question, "store": self.store_path}
+        if endpoint == "session":
+            return "/session", {"topic": topic, "store": self.store_path}
+        if endpoint == "graph":
+            return "/graph", {"store": self.store_path}
+        return "/timeline", {"store": self.store_path, "topic": rng.choice(["", topic])}
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.bytes_received: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int], error: Optional[str], size: int) -> None:
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.bytes_received[endpoint] = self.bytes_received.get(endpoint, 0) + size
+            if error is not None:
+                counts = self.errors.setdefault(endpoint, {})
+                counts[error] = counts.get(error, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints: Dict[str, Any] = {}
+        all_samples: List[float] = []
+        total_errors = 0
+        for endpoint in sorted(self.latencies):
+            samples = self.latencies[endpoint]
+            errors = self.errors.get(endpoint, {})
+            error_count = sum(errors.values())
+            total_errors += error_count
+            all_samples.extend(samples)
+            endpoints[endpoint] = summarize(samples, error_count, elapsed)
+            endpoints[endpoint]["error_kinds"] = errors
+            endpoints[endpoint]["bytes_received"] = self.bytes_received.get(endpoint, 0)
+        return {
+            "elapsed_seconds": elapsed,
+            "overall": summarize(all_samples, total_errors, elapsed),
+            "endpoints": endpoints,
+        }
+
+
+def summarize(samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    count = len(samples)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput_rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": 1000.0 * sum(samples) / count if count else 0.0,
+        "p50_ms": 1000.0 * percentile(samples, 0.50),
+        "p95_ms": 1000.0 * percentile(samples, 0.95),
+        "p99_ms": 1000.0 * percentile(samples, 0.99),
+        "max_ms": 1000.0 * max(samples) if samples else 0.0,
+    }
+
+
+def send_request(host: str, port: int, path: str, body: Dict[str, Any]) -> Tuple[Optional[int], Optional[str], int]:
+    data = json.dumps(body).encode("utf-8")
+    conn = http.client.HTTPConnection(host, port, timeout=REQUEST_TIMEOUT)
+    try:
+        conn.request("POST", path, body=data, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = response.read()
+        error = f"http_{response.status}" if response.status >= 400 else None
+        return response.status, error, len(payload)
+    except (OSError, http.client.HTTPException) as exc:
+        return None, type(exc).__name__, 0
+    finally:
+        conn.close()
+
+
+def run_load(
+    host: str,
+    port: int,
+    factory: RequestFactory,
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    max_requests: int = 0,
+    rate: float = 0.0,
+) -> Dict[str, Any]:
+    stats = LoadStats()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + duration
+    issued = 0
+    issued_lock = threading.Lock()
+
+    def claim() -> bool:
+        nonlocal issued
+        with issued_lock:
+            if max_requests and issued >= max_requests:
+                return False
+            issued += 1
+            return True
+
+    def execute(endpoint: str, rng: random.Random, gen: CorpusGenerator, scheduled: float) -> None:
+        path, body = factory.build(endpoint, rng, gen)
+        status, error, size = send_request(host, port, path, body)
+        stats.record(endpoint, time.perf_counter() - scheduled, status, error, size)
+
+    def closed_loop(worker: int) -> None:
+        rng = random.Random(factory.seed * 1000 + worker)
+        gen = CorpusGenerator(factory.seed * 1000 + worker)
+        while time.perf_counter() < deadline and claim():
+            execute(rng.choices(names, weights=weights)[0], rng, gen, time.perf_counter())
+
+    pending: "queue.Queue[Optional[Tuple[str, float]]]" = queue.Queue()
+
+    def open_loop(worker: int) -> None:
+        rng = random.Random(factory.seed * 1000 + worker)
+        gen = CorpusGenerator(factory.seed * 1000 + worker)
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            endpoint, scheduled = item
+            execute(endpoint, rng, gen, scheduled)
+
+    target = open_loop if rate > 0 else closed_loop
+    threads = [threading.Thread(target=target, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    if rate > 0:
+        rng = random.Random(factory.seed)
+        interval = 1.0 / rate
+        next_at = started
+        while next_at < deadline and claim():
+            now = time.perf_counter()
+            if next_at > now:
+                time.sleep(next_at - now)
+            pending.put((rng.choices(names, weights=weights)[0], next_at))
+            next_at += interval
+        for _ in threads:
+            pending.put(None)
+    for t in threads:
+        t.join()
+    return stats.report(time.perf_counter() - started)
+
+
+class QuietHandler(MnemosyneHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_local_server(work_dir: str) -> ThreadingHTTPServer:
+    server = create_server("127.0.0.1", 0, handler_class=QuietHandler)
+    start_services(server, os.path.join(work_dir, "ingest.wal"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--store")
+    parser.add_argument("--seed-memories", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=0)
+    parser.add_argument("--async-ingest", action="store_true")
+    parser.add_argument("--output")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        print(json.dumps({"error": str(exc)}))
+        return 2
+    work_dir = tempfile.mkdtemp(prefix="mnemosyne-load-")
+    server: Optional[ThreadingHTTPServer] = None
+    try:
+        store_path = args.store or os.path.join(work_dir, "memories.json")
+        if not args.store and args.seed_memories > 0:
+            save_memories(store_path, CorpusGenerator(args.seed).memories(args.seed_memories))
+        host, port = args.host, args.port
+        if not port:
+            server = start_local_server(work_dir)
+            host, port = server.server_address[:2]
+        factory = RequestFactory(store_path, args.seed, async_ingest=args.async_ingest)
+        report = run_load(
+            host,
+            port,
+            factory,
+            mix,
+            concurrency=max(args.concurrency, 1),
+            duration=args.duration,
+            max_requests=args.requests,
+            rate=args.rate,
+        )
+        report["config"] = {
+            "target": f"{host}:{port}",
+            "in_process": server is not None,
+            "store": store_path,
+            "mix": mix,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration": args.duration,
+            "requests": args.requests,
+        }
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        print(text)
+        return 1 if report["overall"]["requests"] == 0 else 0
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            stop_services(server)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(bench_dir)
+for path in [root_dir, bench_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from corpus import CorpusGenerator, parse_size
+from analytics import build_belief_graph, build_timeline
+from memory_pipeline import extract_new_memories, link_revisions, group_contradictions, run_memory_pipeline
+from memory_store import load_memories, save_memories, append_memories, snapshot_memories
+from mnemosyne_engine import answer_query, detect_time_mode, parse_memories
+
+
+DEFAULT_SIZES = "1k,10k"
+DEFAULT_PAIRWISE_CAP = 2000
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_OUTPUT = os.path.join(bench_dir, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(bench_dir, "baseline.json")
+MIN_COMPARABLE_SECONDS = 0.01
+QUESTIONS = {
+    "present": "What do I believe about rag?",
+    "past": "What did I believe about rag as of 2024-06-30?",
+    "range": "What did I think about agents from 2024-03-01 to 2024-09-30?",
+    "past_ambiguous": "What did I believe about memory before the rewrite?",
+}
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "seconds": min(samples),
+        "median_seconds": statistics.median(samples),
+        "repeat": repeat,
+    }
+
+
+def bench_pipeline(
+    gen: CorpusGenerator,
+    memories: List[Dict[str, Any]],
+    pairwise_cap: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    text = gen.raw_text(sentences=8)
+    timestamp = datetime(2026, 1, 1).isoformat()
+    window = memories[-pairwise_cap:]
+    results: Dict[str, Any] = {}
+    results["pipeline.extract_new_memories"] = time_call(
+        lambda: extract_new_memories(text, timestamp, "note"), repeat
+    )
+    new_memories = extract_new_memories(text, timestamp, "note")
+
+    def link() -> None:
+        link_revisions(memories, [dict(m, revision_of=None) for m in new_memories])
+
+    results["pipeline.link_revisions"] = time_call(link, repeat)
+    results["pipeline.group_contradictions"] = time_call(lambda: group_contradictions(window), repeat)
+    results["pipeline.group_contradictions"]["memories"] = len(window)
+    results["pipeline.run_memory_pipeline"] = time_call(
+        lambda: run_memory_pipeline(text, timestamp, "note", window), repeat
+    )
+    results["pipeline.run_memory_pipeline"]["memories"] = len(window)
+    return results
+
+
+def bench_answers(memories: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"answer.parse_memories": time_call(lambda: parse_memories(memories), repeat)}
+    for mode, question in QUESTIONS.items():
+        assert detect_time_mode(question)[0] == mode, question
+        results[f"answer.{mode}"] = time_call(lambda: answer_query(memories, question), repeat)
+    return results
+
+
+def bench_store(memories: List[Dict[str, Any]], gen: CorpusGenerator, repeat: int) -> Dict[str, Any]:
+    work_dir = tempfile.mkdtemp(prefix="mnemosyne-bench-")
+    try:
+        store_path = os.path.join(work_dir, "memories.json")
+        snapshot_dir = os.path.join(work_dir, "snapshots")
+        results: Dict[str, Any] = {}
+        results["store.save"] = time_call(lambda: save_memories(store_path, memories), repeat)
+        results["store.load"] = time_call(lambda: load_memories(store_path), repeat)
+        batch = gen.memories(16)
+
+        def append() -> None:
+            save_memories(store_path, memories)
+            append_memories(store_path, batch)
+
+        append_timing = time_call(append, repeat)
+        save_timing = results["store.save"]["seconds"]
+        append_timing["seconds"] = max(append_timing["seconds"] - save_timing, 0.0)
+        append_timing["median_seconds"] = max(append_timing["median_seconds"] - save_timing, 0.0)
+        results["store.append"] = append_timing
+        save_memories(store_path, memories)
+        results["store.snapshot"] = time_call(lambda: snapshot_memories(store_path, snapshot_dir), repeat)
+        results["store.bytes"] = os.path.getsize(store_path)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_analytics(memories: List[Dict[str, Any]], pairwise_cap: int, repeat: int) -> Dict[str, Any]:
+    contradictions = group_contradictions(memories[-pairwise_cap:])
+    return {
+        "analytics.build_belief_graph": time_call(lambda: build_belief_graph(memories, contradictions), repeat),
+        "analytics.build_timeline": time_call(lambda: build_timeline(memories), repeat),
+        "analytics.build_timeline_topic": time_call(lambda: build_timeline(memories, "rag"), repeat),
+    }
+
+
+def run_size(
+    size: int,
+    seed: int,
+    pairwise_cap: int,
+    repeat: int,
+    suites: List[str],
+) -> Dict[str, Any]:
+    gen = CorpusGenerator(seed)
+    started = time.perf_counter()
+    memories = gen.memories(size)
+    results: Dict[str, Any] = {"corpus.generate": {"seconds": time.perf_counter() - started, "repeat": 1}}
+    if "pipeline" in suites:
+        results.update(bench_pipeline(gen, memories, pairwise_cap, repeat))
+    if "answer" in suites:
+        results.update(bench_answers(memories, repeat))
+    if "store" in suites:
+        results.update(bench_store(memories, gen, repeat))
+    if "analytics" in suites:
+        results.update(bench_analytics(memories, pairwise_cap, repeat))
+    return results
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[Dict[str, Any]]:
+    regressions: List[Dict[str, Any]] = []
+    for size, benches in current.get("results", {}).items():
+        base_benches = baseline.get("results", {}).get(size, {})
+        for name, timing in benches.items():
+            base = base_benches.get(name)
+            if not isinstance(timing, dict) or not isinstance(base, dict) or name.startswith("corpus."):
+                continue
+            if base["seconds"] < MIN_COMPARABLE_SECONDS and timing["seconds"] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = timing["seconds"] / max(base["seconds"], 1e-9)
+            if ratio > 1.0 + threshold:
+                regressions.append(
+                    {
+                        "size": size,
+                        "benchmark": name,
+                        "baseline_seconds": base["seconds"],
+                        "seconds": timing["seconds"],
+                        "ratio": ratio,
+                    }
+                )
+    return regressions
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pairwise-cap", type=int, default=DEFAULT_PAIRWISE_CAP)
+    parser.add_argument("--suites", default="pipeline,answer,store,analytics")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    report: Dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "pairwise_cap": args.pairwise_cap,
+            "suites": suites,
+        },
+        "results": {},
+    }
+    for label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        size = parse_size(label)
+        print(f"Running benchmarks for {size} memories...", file=sys.stderr)
+        report["results"][str(size)] = run_size(size, args.seed, args.pairwise_cap, args.repeat, suites)
+    write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(json.dumps({"output": args.output, "baseline": args.baseline, "regressions": []}, indent=2))
+        return 0
+    regressions: List[Dict[str, Any]] = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+    print(
+        json.dumps(
+            {
+                "output": args.output,
+                "baseline": args.baseline if os.path.exists(args.baseline) else None,
+                "threshold": args.threshold,
+                "regressions": regressions,
+            },
+            indent=2,
+        )
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, TextIO
+
+from change_feed import append_changes
+from memory_store import store_lock
+from partitioned_store import (
+    is_partitioned_store,
+    load_manifest,
+    partition_may_match,
+    read_partition,
+    append_partitioned,
+)
+
+
+READ_CHUNK_SIZE = 1 << 16
+IMPORT_BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = 20
+MEMORY_TYPES = ["belief", "fact", "reflection", "decision"]
+
+
+def iter_json_array(f: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[pos] != "[":
+        raise ValueError("Expected a JSON array.")
+    pos += 1
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unterminated JSON array.")
+        if buffer[pos] == "]":
+            return
+        if started:
+            if buffer[pos] != ",":
+                raise ValueError(f"Expected ',' in JSON array, found {buffer[pos]!r}.")
+            pos += 1
+            if not skip_whitespace():
+                raise ValueError("Unterminated JSON array.")
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            scalar = buffer[pos] not in "{[\""
+            if scalar and not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                if fill():
+                    continue
+            break
+        pos = end
+        started = True
+        yield item
+
+
+def iter_jsonl(f: TextIO) -> Iterator[Any]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def detect_format(path: str) -> str:
+    if path.endswith(".jsonl"):
+        return "jsonl"
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            ch = f.read(1)
+            if not ch:
+                return "json"
+            if not ch.isspace():
+                return "json" if ch == "[" else "jsonl"
+
+
+def iter_memory_file(path: str, fmt: str = "auto") -> Iterator[Any]:
+    if fmt == "auto":
+        fmt = detect_format(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            yield from iter_jsonl(f)
+        else:
+            yield from iter_json_array(f)
+
+
+def iter_store(
+    path: str,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> Iterator[Any]:
+    if is_partitioned_store(path):
+        manifest = load_manifest(path)
+        for key in sorted(manifest["partitions"]):
+            entry = manifest["partitions"][key]
+            if partition_may_match(entry, start_iso, end_iso, topic):
+                yield from read_partition(path, entry)
+        return
+    if not os.path.exists(path):
+        return
+    yield from iter_memory_file(path)
+
+
+def validate_memory(raw: Any) -> Optional[str]:
+    if not isinstance(raw, dict):
+        return "record is not an object"
+    for field in ["memory_id", "content", "created_at", "memory_type", "source"]:
+        if not isinstance(raw.get(field), str) or not raw[field]:
+            return f"field '{field}' must be a non-empty string"
+    try:
+        datetime.fromisoformat(raw["created_at"])
+    except ValueError:
+        return "field 'created_at' is not an ISO timestamp"
+    if raw["memory_type"] not in MEMORY_TYPES:
+        return f"field 'memory_type' must be one of {', '.join(MEMORY_TYPES)}"
+    confidence = raw.get("confidence")
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0.0 <= confidence <= 1.0:
+        return "field 'confidence' must be a number between 0 and 1"
+    topic = raw.get("topic")
+    if not isinstance(topic, list) or not all(isinstance(t, str) for t in topic):
+        return "field 'topic' must be a list of strings"
+    if raw.get("revision_of") is not None and not isinstance(raw["revision_of"], str):
+        return "field 'revision_of' must be a string or null"
+    return None
+
+
+def matches_filters(
+    memory: Dict[str, Any],
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> bool:
+    created_at = memory.get("created_at") or ""
+    if start_iso is not None and created_at < start_iso:
+        return False
+    if end_iso is not None and created_at > end_iso:
+        return False
+    if topic:
+        lower = topic.lower()
+        if not any(lower == t or lower in t for t in (str(x).lower() for x in memory.get("topic", []))):
+            return False
+    return True
+
+
+class MemoryWriter:
+    def __init__(self, f: TextIO, fmt: str) -> None:
+        self.f = f
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "json":
+            f.write("[")
+
+    def write(self, memory: Dict[str, Any]) -> None:
+        data = json.dumps(memory, ensure_ascii=False, separators=(",", ":"))
+        if self.fmt == "jsonl":
+            self.f.write(data + "\n")
+        else:
+            self.f.write(("," if self.count else "") + "\n" + data)
+        self.count += 1
+
+    def close(self) -> None:
+        if self.fmt == "json":
+            self.f.write("\n]\n" if self.count else "]\n")
+
+
+class TransferStats:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.read = 0
+        self.written = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def reject(self, position: int, raw: Any, reason: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            memory_id = raw.get("memory_id") if isinstance(raw, dict) else None
+            self.errors.append({"position": position, "memory_id": memory_id, "error": reason})
+
+    def report(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.started
+        return {
+            "read": self.read,
+            "written": self.written,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": seconds,
+            "memories_per_second": self.read / seconds if seconds > 0 else 0.0,
+        }
+
+
+def export_memories(
+    store_path: str,
+    output_path: str,
+    fmt: str = "jsonl",
+    topic: Optional[str] = None,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+) -> Dict[str, Any]:
+    stats = TransferStats()
+    directory = os.path.dirname(output_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        writer = MemoryWriter(f, fmt)
+        for raw in iter_store(store_path, start_iso=start_iso, end_iso=end_iso, topic=topic):
+            stats.read += 1
+            reason = validate_memory(raw)
+            if reason is not None:
+                stats.reject(stats.read - 1, raw, reason)
+                continue
+            if not matches_filters(raw, start_iso, end_iso, topic):
+                continue
+            writer.write(raw)
+            stats.written += 1
+        writer.close()
+    os.replace(tmp_path, output_path)
+    return stats.report()
+
+
+def import_memories(
+    input_path: str,
+    store_path: str,
+    fmt: str = "auto",
+    topic: Optional[str] = None,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    stats = TransferStats()
+
+    def accepted() -> Iterator[Dict[str, Any]]:
+        for position, raw in enumerate(iter_memory_file(input_path, fmt)):
+            stats.read += 1
+            reason = validate_memory(raw)
+            if reason is not None:
+                stats.reject(position, raw, reason)
+                continue
+            if matches_filters(raw, start_iso, end_iso, topic):
+                yield raw
+
+    if is_partitioned_store(store_path):
+        with store_lock(store_path):
+            batch: List[Dict[str, Any]] = []
+            for raw in accepted():
+                batch.append(raw)
+                if len(batch) >= batch_size:
+                    append_partitioned(store_path, batch)
+                    stats.written += len(batch)
+                    batch = []
+            if batch:
+                append_partitioned(store_path, batch)
+                stats.written += len(batch)
+            if stats.written:
+                append_changes(store_path, [{"type": "reset", "reason": "import"}])
+        return stats.report()
+
+    directory = os.path.dirname(store_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with store_lock(store_path):
+        tmp_path = store_path + ".import.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            writer = MemoryWriter(f, "json")
+            if os.path.exists(store_path) and os.path.getsize(store_path) > 0:
+                for raw in iter_memory_file(store_path, "json"):
+                    writer.write(raw)
+            for raw in accepted():
+                writer.write(raw)
+                stats.written += 1
+            writer.close()
+        os.replace(tmp_path, store_path)
+        if stats.written:
+            append_changes(store_path, [{"type": "reset", "reason": "import"}])
+    return stats.report()
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from memory_pipeline import contradictions_involving
+from partitioned_store import is_partitioned_store
+
+
+CHANGES_NAME = "changes.jsonl"
+EVENT_TYPES = ["memory", "revision", "merge", "contradiction", "reset"]
+DEFAULT_POLL_INTERVAL = 0.25
+MAX_READ_EVENTS = 1000
+
+_appended = threading.Condition()
+
+
+def changes_path(store_path: str) -> str:
+    if is_partitioned_store(store_path):
+        return os.path.join(store_path, CHANGES_NAME)
+    return store_path + ".changes.jsonl"
+
+
+def changes_size(store_path: str) -> int:
+    try:
+        return os.path.getsize(changes_path(store_path))
+    except OSError:
+        return 0
+
+
+def memory_events(new_memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    for m in new_memories:
+        events.append({"type": "memory", "memory": m})
+        if m.get("revision_of"):
+            events.append({"type": "revision", "memory_id": m["memory_id"], "revision_of": m["revision_of"]})
+    return events
+
+
+def merge_events(merges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"type": "merge", "memory_id": m["memory_id"], "merged": m["merged"]} for m in merges]
+
+
+def contradiction_events(contradictions: List[Dict[str, Any]], new_ids: List[str]) -> List[Dict[str, Any]]:
+    return [{"type": "contradiction", "contradiction": c} for c in contradictions_involving(contradictions, new_ids)]
+
+
+def append_changes(store_path: str, events: List[Dict[str, Any]]) -> int:
+    path = changes_path(store_path)
+    if not events:
+        return changes_size(store_path)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    committed_at = datetime.utcnow().isoformat()
+    data = "".join(
+        json.dumps(dict(e, committed_at=committed_at), ensure_ascii=False, separators=(",", ":")) + "\n"
+        for e in events
+    )
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        end = f.tell()
+    with _appended:
+        _appended.notify_all()
+    return end
+
+
+def read_changes(
+    store_path: str,
+    cursor: int,
+    limit: int = MAX_READ_EVENTS,
+) -> Tuple[List[Dict[str, Any]], int]:
+    path = changes_path(store_path)
+    size = changes_size(store_path)
+    if cursor > size:
+        return [{"type": "reset", "cursor": size}], size
+    events: List[Dict[str, Any]] = []
+    if cursor == size:
+        return events, cursor
+    with open(path, "rb") as f:
+        f.seek(cursor)
+        while len(events) < limit:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            cursor += len(line)
+            try:
+                event = json.loads(line.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                continue
+            event["cursor"] = cursor
+            events.append(event)
+    return events, cursor
+
+
+def wait_for_changes(
+    store_path: str,
+    cursor: int,
+    timeout: float,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    limit: int = MAX_READ_EVENTS,
+) -> Tuple[List[Dict[str, Any]], int]:
+    deadline = time.monotonic() + timeout
+    while True:
+        events, next_cursor = read_changes(store_path, cursor, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events, next_cursor
+        with _appended:
+            _appended.wait(min(poll_interval, remaining))
+
+
+def parse_cursor(value: Optional[str], store_path: str) -> int:
+    if value is None or value == "" or value == "end":
+        return changes_size(store_path)
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError("Cursor must not be negative.")
+    return cursor
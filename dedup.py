@@ -0,0 +1,164 @@
+import random
+import zlib
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.8
+DEDUP_POLICIES = ["off", "flag", "merge", "skip"]
+
+_PRIME = 4294967311
+_rng = random.Random(20260115)
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def normalize_text(text: str) -> str:
+    chars = [ch.lower() if ch.isalnum() else " " for ch in text]
+    return " ".join("".join(chars).split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode("utf-8"))}
+    return {
+        zlib.crc32(normalized[i : i + size].encode("utf-8"))
+        for i in range(len(normalized) - size + 1)
+    }
+
+
+def minhash_signature(text: str) -> List[int]:
+    values = shingles(text)
+    return [min((a * x + b) % _PRIME for x in values) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig1: List[int], sig2: List[int]) -> float:
+    if not sig1 or len(sig1) != len(sig2):
+        return 0.0
+    same = sum(1 for x, y in zip(sig1, sig2) if x == y)
+    return same / len(sig1)
+
+
+class LSHIndex:
+    def __init__(self, bands: int = BANDS) -> None:
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self.signatures: Dict[str, List[int]] = {}
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, tuple(signature[band * self.rows : (band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, memory_id: str, signature: List[int]) -> None:
+        if memory_id in self.signatures:
+            return
+        self.signatures[memory_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(memory_id)
+
+    def add_memory(self, memory: Dict[str, Any]) -> List[int]:
+        signature = minhash_signature(memory.get("content", ""))
+        self.add(memory["memory_id"], signature)
+        return signature
+
+    def extend(self, memories: List[Dict[str, Any]]) -> int:
+        added = 0
+        for m in memories:
+            if m["memory_id"] not in self.signatures:
+                self.add_memory(m)
+                added += 1
+        return added
+
+    def query(
+        self,
+        signature: List[int],
+        threshold: float = SIMILARITY_THRESHOLD,
+    ) -> Optional[Tuple[str, float]]:
+        candidates: Set[str] = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, []))
+        best: Optional[Tuple[str, float]] = None
+        for memory_id in candidates:
+            similarity = estimate_similarity(signature, self.signatures[memory_id])
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (memory_id, similarity)
+        return best
+
+
+def apply_dedup_policy(
+    new_memories: List[Dict[str, Any]],
+    index: LSHIndex,
+    policy: str,
+    batch: Optional[LSHIndex] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+    counts: Dict[str, Any] = {"policy": policy, "flagged": 0, "merged": 0, "skipped": 0}
+    kept: List[Dict[str, Any]] = []
+    near_duplicates: List[Dict[str, Any]] = []
+    if batch is None:
+        batch = LSHIndex(bands=index.bands)
+    for m in new_memories:
+        signature = minhash_signature(m["content"])
+        match = index.query(signature) or batch.query(signature)
+        if match is not None:
+            duplicate_of, similarity = match
+            if policy == "skip":
+                counts["skipped"] += 1
+                continue
+            action = "flagged" if policy == "flag" else "merged"
+            counts[action] += 1
+            near_duplicates.append(
+                {
+                    "memory_id": m["memory_id"],
+                    "content": m["content"],
+                    "source": m.get("source"),
+                    "created_at": m.get("created_at"),
+                    "duplicate_of": duplicate_of,
+                    "similarity": similarity,
+                    "action": action,
+                }
+            )
+            if policy == "merge":
+                entry = merge_entry(m, similarity)
+                if duplicate_of in batch.signatures:
+                    kept = apply_merges(kept, [{"memory_id": duplicate_of, "merged": entry}])[0]
+                continue
+        batch.add(m["memory_id"], signature)
+        kept.append(m)
+    return kept, near_duplicates, counts
+
+
+def merge_entry(duplicate: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+    return {
+        "memory_id": duplicate["memory_id"],
+        "source": duplicate.get("source"),
+        "created_at": duplicate.get("created_at"),
+        "similarity": similarity,
+    }
+
+
+def apply_merges(
+    memories: List[Dict[str, Any]],
+    merges: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    by_target: Dict[str, List[Dict[str, Any]]] = {}
+    for merge in merges:
+        by_target.setdefault(merge["memory_id"], []).append(merge)
+    if not by_target:
+        return memories, []
+    applied: List[Dict[str, Any]] = []
+    result: List[Dict[str, Any]] = []
+    for m in memories:
+        targeted = by_target.get(m["memory_id"])
+        if targeted:
+            entries = [merge["merged"] for merge in targeted]
+            m = dict(m, merged_from=list(m.get("merged_from") or []) + entries)
+            applied.extend(targeted)
+        result.append(m)
+    return result, applied
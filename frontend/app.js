@@ -15,17 +15,52 @@ return JSON.stringify(value, null, 2);
 return String(value);
 }
 }
+var etagCache = {};
+function fetchWithEtag(url, options, cacheKey) {
+var cached = etagCache[cacheKey];
+options.headers = options.headers || {};
+if (cached) {
+options.headers["If-None-Match"] = cached.etag;
+}
+return fetch(url, options).then(function (res) {
+if (res.status === 304 && cached) {
+return cached.data;
+}
+var etag = res.headers.get("ETag");
+return res.json().then(function (data) {
+if (etag && res.ok) {
+etagCache[cacheKey] = {
+etag: etag,
+data: data
+};
+}
+return data;
+});
+});
+}
 function callApi(path, body) {
 var base = getApiBase();
-return fetch(base + path, {
+var serialized = JSON.stringify(body);
+return fetchWithEtag(base + path, {
 method: "POST",
 headers: {
 "Content-Type": "application/json"
 },
-body: JSON.stringify(body)
-}).then(function (res) {
-return res.json();
-});
+body: serialized
+}, base + path + " " + serialized);
+}
+function getApi(path, params) {
+var query = Object.keys(params).map(function (key) {
+return encodeURIComponent(key) + "=" + encodeURIComponent(params[key]);
+}).join("&");
+var url = getApiBase() + path + (query ? "?" + query : "");
+return fetchWithEtag(url, {}, url);
+}
+function formatOverview(o) {
+var types = Object.keys(o.memory_types).sort().map(function (name) {
+return name + " " + o.memory_types[name];
+}).join(", ");
+return o.topic + ": " + o.count + " memories (" + types + "), confidence " + o.average_confidence.toFixed(2) + ", " + o.revision_heads.length + " chains, " + o.contradictions + " contradictions";
 }
 function wireApiConfig() {
 var input = document.getElementById("api-base-input");
@@ -126,46 +161,269 @@ payload.end = end;
 }
 output.textContent = "Running session...";
 callApi("/session", payload).then(function (data) {
+if (data.answer && data.overview) {
+output.textContent = formatOverview(data.overview) + "\n\n" + data.answer;
+} else {
 output.textContent = data.answer || formatJson(data);
+}
 }).catch(function (err) {
 output.textContent = "Error: " + String(err);
 });
 });
 }
-function wireGraphAndTimeline() {
-var storeEl = document.getElementById("graph-store");
-var topicEl = document.getElementById("timeline-topic");
-var graphBtn = document.getElementById("graph-submit");
-var timelineBtn = document.getElementById("timeline-submit");
-var graphOut = document.getElementById("graph-output");
-var timelineOut = document.getElementById("timeline-output");
-graphBtn.addEventListener("click", function () {
-var store = storeEl.value.trim() || "data/memories.json";
-var payload = {
-store: store
+var live = {
+store: null,
+topic: "",
+timeline: null,
+graph: null,
+source: null,
+cursor: null
 };
+function renderTimeline() {
+document.getElementById("timeline-output").textContent = formatJson(live.timeline);
+}
+function renderGraph() {
+document.getElementById("graph-output").textContent = formatJson(live.graph);
+}
+function hasEdge(edges, edge) {
+return edges.some(function (e) {
+return e.source === edge.source && e.target === edge.target && e.type === edge.type;
+});
+}
+function addGraphEdge(edge) {
+if (!hasEdge(live.graph.edges, edge)) {
+live.graph.edges.push(edge);
+}
+}
+function applyMemory(m) {
+if (live.timeline) {
+var topics = (m.topic || []).map(function (t) {
+return String(t).toLowerCase();
+});
+var wanted = !live.topic || topics.indexOf(live.topic.toLowerCase()) !== -1;
+var known = live.timeline.some(function (item) {
+return item.memory_id === m.memory_id;
+});
+if (wanted && !known && m.created_at) {
+live.timeline.push(m);
+live.timeline.sort(function (a, b) {
+return a.created_at < b.created_at ? -1 : a.created_at > b.created_at ? 1 : 0;
+});
+renderTimeline();
+}
+}
+if (live.graph) {
+var ids = live.graph.nodes.map(function (n) {
+return n.id;
+});
+if (ids.indexOf(m.memory_id) === -1) {
+live.graph.nodes.push({
+id: m.memory_id,
+type: "memory",
+created_at: m.created_at,
+memory_type: m.memory_type,
+confidence: m.confidence,
+topic: m.topic || []
+});
+(m.topic || []).forEach(function (t) {
+if (ids.indexOf("topic:" + t) === -1) {
+live.graph.nodes.push({
+id: "topic:" + t,
+type: "topic",
+label: t
+});
+ids.push("topic:" + t);
+}
+addGraphEdge({
+source: m.memory_id,
+target: "topic:" + t,
+type: "about"
+});
+});
+renderGraph();
+}
+}
+}
+function applyRevision(event) {
+if (live.graph) {
+addGraphEdge({
+source: event.memory_id,
+target: event.revision_of,
+type: "revises"
+});
+renderGraph();
+}
+}
+function applyContradiction(event) {
+if (!live.graph) {
+return;
+}
+var ids = (event.contradiction.conflicting_memories || []).map(function (x) {
+return x.memory_id;
+});
+for (var i = 0; i < ids.length; i++) {
+for (var j = i + 1; j < ids.length; j++) {
+addGraphEdge({
+source: ids[i],
+target: ids[j],
+type: "contradicts"
+});
+}
+}
+renderGraph();
+}
+function trackCursor(e) {
+var cursor = parseInt(e.lastEventId, 10);
+if (!isNaN(cursor)) {
+live.cursor = cursor;
+}
+}
+function subscribeChanges(store, cursor) {
+if (!window.EventSource) {
+return;
+}
+if (live.source && live.store === store && live.cursor <= cursor) {
+return;
+}
+if (live.source) {
+live.source.close();
+}
+live.store = store;
+live.cursor = cursor;
+live.source = new EventSource(
+getApiBase() + "/changes?store=" + encodeURIComponent(store) + "&cursor=" + encodeURIComponent(cursor)
+);
+live.source.addEventListener("ready", trackCursor);
+live.source.addEventListener("memory", function (e) {
+trackCursor(e);
+applyMemory(JSON.parse(e.data).memory);
+});
+live.source.addEventListener("revision", function (e) {
+trackCursor(e);
+applyRevision(JSON.parse(e.data));
+});
+live.source.addEventListener("contradiction", function (e) {
+trackCursor(e);
+applyContradiction(JSON.parse(e.data));
+});
+live.source.addEventListener("reset", function (e) {
+trackCursor(e);
+if (live.graph) {
+loadGraph(store);
+}
+if (live.timeline) {
+loadTimeline(store, live.topic);
+}
+});
+}
+function loadGraph(store) {
+var graphOut = document.getElementById("graph-output");
+if (live.store !== store) {
+live.timeline = null;
+}
 graphOut.textContent = "Loading graph...";
-callApi("/graph", payload).then(function (data) {
-graphOut.textContent = formatJson(data);
+callApi("/graph", {
+store: store
+}).then(function (data) {
+live.graph = data;
+renderGraph();
+subscribeChanges(store, data.cursor);
 }).catch(function (err) {
 graphOut.textContent = "Error: " + String(err);
 });
-});
-timelineBtn.addEventListener("click", function () {
-var store = storeEl.value.trim() || "data/memories.json";
-var topic = topicEl.value.trim();
+}
+function loadTimeline(store, topic) {
+var timelineOut = document.getElementById("timeline-output");
 var payload = {
 store: store
 };
 if (topic) {
 payload.topic = topic;
 }
+if (live.store !== store) {
+live.graph = null;
+}
 timelineOut.textContent = "Loading timeline...";
 callApi("/timeline", payload).then(function (data) {
-timelineOut.textContent = formatJson(data.items || data);
+live.topic = topic;
+live.timeline = data.items || [];
+renderTimeline();
+subscribeChanges(store, data.cursor);
 }).catch(function (err) {
 timelineOut.textContent = "Error: " + String(err);
 });
+}
+function wireGraphAndTimeline() {
+var storeEl = document.getElementById("graph-store");
+var topicEl = document.getElementById("timeline-topic");
+var graphBtn = document.getElementById("graph-submit");
+var timelineBtn = document.getElementById("timeline-submit");
+graphBtn.addEventListener("click", function () {
+loadGraph(storeEl.value.trim() || "data/memories.json");
+});
+timelineBtn.addEventListener("click", function () {
+loadTimeline(storeEl.value.trim() || "data/memories.json", topicEl.value.trim());
+});
+}
+var topicsPage = {
+offset: 0,
+limit: 20,
+total: 0
+};
+function loadTopics() {
+var store = document.getElementById("topics-store").value.trim() || "data/memories.json";
+var list = document.getElementById("topics-list");
+var output = document.getElementById("topics-output");
+output.textContent = "Loading topics...";
+getApi("/topics", {
+store: store,
+sort: document.getElementById("topics-sort").value,
+offset: topicsPage.offset,
+limit: topicsPage.limit
+}).then(function (data) {
+if (data.error) {
+output.textContent = data.error;
+return;
+}
+topicsPage.total = data.total;
+list.innerHTML = "";
+data.topics.forEach(function (o) {
+var item = document.createElement("li");
+var button = document.createElement("button");
+button.textContent = formatOverview(o);
+button.addEventListener("click", function () {
+document.getElementById("graph-store").value = store;
+document.getElementById("timeline-topic").value = o.topic;
+output.textContent = "Latest [" + o.latest.created_at + "]: " + o.latest.content;
+loadTimeline(store, o.topic);
+});
+item.appendChild(button);
+list.appendChild(item);
+});
+var last = Math.min(data.offset + data.topics.length, data.total);
+output.textContent = "Topics " + (data.total ? data.offset + 1 : 0) + "-" + last + " of " + data.total;
+}).catch(function (err) {
+output.textContent = "Error: " + String(err);
+});
+}
+function wireTopics() {
+document.getElementById("topics-submit").addEventListener("click", function () {
+topicsPage.offset = 0;
+loadTopics();
+});
+document.getElementById("topics-sort").addEventListener("change", function () {
+topicsPage.offset = 0;
+loadTopics();
+});
+document.getElementById("topics-prev").addEventListener("click", function () {
+topicsPage.offset = Math.max(topicsPage.offset - topicsPage.limit, 0);
+loadTopics();
+});
+document.getElementById("topics-next").addEventListener("click", function () {
+if (topicsPage.offset + topicsPage.limit < topicsPage.total) {
+topicsPage.offset += topicsPage.limit;
+loadTopics();
+}
 });
 }
 window.addEventListener("DOMContentLoaded", function () {
@@ -173,6 +431,7 @@ wireApiConfig();
 wireIngest();
 wireQuestion();
 wireSession();
+wireTopics();
 wireGraphAndTimeline();
 });
 
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from dedup import LSHIndex, apply_merges
+from memory_pipeline import contradictions_involving, group_contradictions, run_memory_pipeline
+from memory_store import load_memories, append_memories
+from store_index import open_index, dedup_index
+
+
+DEFAULT_WAL = "data/ingest.wal"
+MAX_FINISHED_JOBS = 10000
+JOB_ID_CHARS = set("0123456789abcdef-")
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        wal_path: str = DEFAULT_WAL,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        jobs_dir: Optional[str] = None,
+    ) -> None:
+        self.wal_path = wal_path
+        self.jobs_dir = jobs_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: List[Dict[str, Any]] = []
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self.replay()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ingest-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, request: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        request = dict(request)
+        if not request.get("timestamp"):
+            request["timestamp"] = datetime.utcnow().isoformat()
+        record = {
+            "op": "enqueue",
+            "job_id": job_id,
+            "submitted_at": datetime.utcnow().isoformat(),
+            "request": request,
+        }
+        with self._cond:
+            self._write_wal([record])
+            self._track(record)
+            self._publish([job_id])
+            self._cond.notify_all()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        if self.jobs_dir is None or not job_id or not set(job_id) <= JOB_ID_CHARS:
+            return None
+        try:
+            with open(os.path.join(self.jobs_dir, job_id + ".json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _publish(self, job_ids: List[str]) -> None:
+        if self.jobs_dir is None:
+            return
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        for job_id in job_ids:
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            path = os.path.join(self.jobs_dir, job_id + ".json")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def replay(self) -> int:
+        if not os.path.exists(self.wal_path):
+            return 0
+        enqueued: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        commits: Dict[str, List[str]] = {}
+        with open(self.wal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("op") == "enqueue":
+                    enqueued[record["job_id"]] = record
+                elif record.get("op") == "commit":
+                    commits[record["job_id"]] = record.get("memory_ids") or []
+                elif record.get("op") == "done":
+                    enqueued.pop(record.get("job_id"), None)
+        applied = self._applied_jobs([r for r in enqueued.values() if r["job_id"] in commits], commits)
+        with self._cond:
+            if applied:
+                self._write_wal([{"op": "done", "job_id": job_id, "status": "done"} for job_id in applied])
+            finished_at = datetime.utcnow().isoformat()
+            for record in enqueued.values():
+                if record["job_id"] in self.jobs:
+                    continue
+                if record["job_id"] in applied:
+                    self.jobs[record["job_id"]] = {
+                        "job_id": record["job_id"],
+                        "status": "done",
+                        "submitted_at": record["submitted_at"],
+                        "finished_at": finished_at,
+                    }
+                else:
+                    self._track(record)
+            self._publish([record["job_id"] for record in enqueued.values()])
+            self._cond.notify_all()
+        return len(enqueued) - len(applied)
+
+    def _applied_jobs(self, records: List[Dict[str, Any]], commits: Dict[str, List[str]]) -> List[str]:
+        by_store: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_store.setdefault(record["request"]["store"], []).append(record)
+        applied: List[str] = []
+        for store_path, store_records in by_store.items():
+            try:
+                stored = {m["memory_id"] for m in load_memories(store_path)}
+            except (OSError, ValueError, KeyError):
+                continue
+            for record in store_records:
+                memory_ids = commits[record["job_id"]]
+                if not memory_ids or stored.intersection(memory_ids):
+                    applied.append(record["job_id"])
+        return applied
+
+    def _track(self, record: Dict[str, Any]) -> None:
+        self.jobs[record["job_id"]] = {
+            "job_id": record["job_id"],
+            "status": "queued",
+            "submitted_at": record["submitted_at"],
+        }
+        self._pending.append(record)
+
+    def _write_wal(self, records: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.wal_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with open(self.wal_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if self._stopping and not self._pending:
+                    return
+            if self.flush_interval and not self._stopping:
+                time.sleep(self.flush_interval)
+            with self._cond:
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                self._in_flight = len(batch)
+                for record in batch:
+                    self.jobs[record["job_id"]]["status"] = "running"
+                self._publish([record["job_id"] for record in batch])
+            self._process_batch(batch)
+            with self._cond:
+                self._in_flight = 0
+                if not self._pending:
+                    self._compact()
+                self._cond.notify_all()
+
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        by_store: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        for record in batch:
+            by_store.setdefault(record["request"]["store"], []).append(record)
+        done: List[Dict[str, Any]] = []
+        for store_path, records in by_store.items():
+            results: Dict[str, Dict[str, Any]] = {}
+            try:
+                existing = load_memories(store_path)
+                shared_dedup = None
+                pending = LSHIndex()
+                accumulated: List[Dict[str, Any]] = []
+                merges: List[Dict[str, Any]] = []
+                memory_ids: Dict[str, List[str]] = {}
+                for record in records:
+                    request = record["request"]
+                    dedup = request.get("dedup") or "off"
+                    if dedup != "off" and shared_dedup is None:
+                        shared_dedup = dedup_index(store_path, existing)
+                    result = run_memory_pipeline(
+                        request["text"],
+                        request["timestamp"],
+                        request["source"],
+                        existing + accumulated,
+                        profile=request.get("profile") or "default",
+                        dedup=dedup,
+                        dedup_index=shared_dedup if dedup != "off" else None,
+                        dedup_batch=pending,
+                        detect_contradictions=False,
+                    )
+                    memory_ids[record["job_id"]] = [m["memory_id"] for m in result["new_memories"]]
+                    accumulated, applied = apply_merges(accumulated, result["merges"])
+                    merges.extend(m for m in result["merges"] if m not in applied)
+                    accumulated.extend(result["new_memories"])
+                    pending.extend(result["new_memories"])
+                    results[record["job_id"]] = result
+                contradictions = group_contradictions(existing + accumulated)
+                with self._cond:
+                    self._write_wal(
+                        [{"op": "commit", "job_id": job_id, "memory_ids": ids} for job_id, ids in memory_ids.items()]
+                    )
+                combined = append_memories(store_path, accumulated, contradictions=contradictions, merges=merges)
+                open_index(store_path, combined)
+            except Exception as exc:
+                for record in records:
+                    done.append({"op": "done", "job_id": record["job_id"], "status": "failed", "error": str(exc)})
+                continue
+            for record in records:
+                result = results[record["job_id"]]
+                summary = {
+                    "new_memories": result["new_memories"],
+                    "revisions": result["revisions"],
+                    "contradictions": contradictions_involving(contradictions, memory_ids[record["job_id"]]),
+                    "near_duplicates": result["near_duplicates"],
+                    "dedup": result["dedup"],
+                    "total_memories": len(combined),
+                }
+                done.append({"op": "done", "job_id": record["job_id"], "status": "done", "result": summary})
+        with self._cond:
+            self._write_wal([{"op": r["op"], "job_id": r["job_id"], "status": r["status"]} for r in done])
+            finished_at = datetime.utcnow().isoformat()
+            for r in done:
+                job = self.jobs.get(r["job_id"])
+                if job is None:
+                    continue
+                job["status"] = r["status"]
+                job["finished_at"] = finished_at
+                if "result" in r:
+                    job["result"] = r["result"]
+                if "error" in r:
+                    job["error"] = r["error"]
+            self._publish([r["job_id"] for r in done])
+            self._trim_jobs()
+
+    def _trim_jobs(self) -> None:
+        while len(self.jobs) > MAX_FINISHED_JOBS:
+            oldest = next(iter(self.jobs.values()))
+            if oldest["status"] in ["queued", "running"]:
+                break
+            self.jobs.popitem(last=False)
+            if self.jobs_dir is not None:
+                try:
+                    os.remove(os.path.join(self.jobs_dir, oldest["job_id"] + ".json"))
+                except OSError:
+                    pass
+
+    def _compact(self) -> None:
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
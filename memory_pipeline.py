@@ -1,7 +1,10 @@
 import json
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
+
+from dedup import LSHIndex, apply_dedup_policy, merge_entry
+from metrics import timed, increment
 
 
 def split_sentences(text: str) -> List[str]:
@@ -122,7 +125,34 @@ def detect_contradiction_pair(m1: Dict[str, Any], m2: Dict[str, Any]) -> bool:
     return False
 
 
+def contradiction_class(m: Dict[str, Any]) -> str:
+    content = m["content"].lower()
+    return ("n" if " not " in content else "-") + ("l" if "no longer" in content else "-")
+
+
 def group_contradictions(memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    with timed("group_contradictions"):
+        contradictions = _group_contradictions(memories)
+    n = len(memories)
+    increment("memories_scanned", n, stage="group_contradictions")
+    increment("pairs_compared", n * (n - 1) // 2, stage="group_contradictions")
+    return contradictions
+
+
+def contradictions_involving(contradictions: List[Dict[str, Any]], memory_ids: List[str]) -> List[Dict[str, Any]]:
+    wanted = set(memory_ids)
+    seen = set()
+    involved: List[Dict[str, Any]] = []
+    for c in contradictions:
+        ids = tuple(sorted(x["memory_id"] for x in c.get("conflicting_memories", [])))
+        if ids in seen or not wanted.intersection(ids):
+            continue
+        seen.add(ids)
+        involved.append(c)
+    return involved
+
+
+def _group_contradictions(memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     contradictions: List[Dict[str, Any]] = []
     n = len(memories)
     for i in range(n):
@@ -155,6 +185,11 @@ def group_contradictions(memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]
 
 
 def extract_new_memories(raw_content: str, timestamp: str, source: str, profile: str = "default") -> List[Dict[str, Any]]:
+    with timed("extract_new_memories"):
+        return _extract_new_memories(raw_content, timestamp, source, profile)
+
+
+def _extract_new_memories(raw_content: str, timestamp: str, source: str, profile: str) -> List[Dict[str, Any]]:
     sentences = split_sentences(raw_content)
     created_at = datetime.fromisoformat(timestamp)
     new_memories: List[Dict[str, Any]] = []
@@ -183,37 +218,80 @@ def link_revisions(
     new_memories: List[Dict[str, Any]],
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     revisions: List[Dict[str, Any]] = []
-    by_id = {m["memory_id"]: m for m in existing_memories}
-    for new in new_memories:
-        for old in existing_memories:
-            if not topics_overlap(old.get("topic", []), new.get("topic", [])):
-                continue
-            if detect_revision(old, new):
-                new["revision_of"] = old["memory_id"]
-                revisions.append(
-                    {
-                        "memory_id": new["memory_id"],
-                        "revision_of": old["memory_id"],
-                    }
-                )
-                break
+    scanned = 0
+    with timed("link_revisions"):
+        for new in new_memories:
+            for old in existing_memories:
+                scanned += 1
+                if not topics_overlap(old.get("topic", []), new.get("topic", [])):
+                    continue
+                if detect_revision(old, new):
+                    new["revision_of"] = old["memory_id"]
+                    revisions.append(
+                        {
+                            "memory_id": new["memory_id"],
+                            "revision_of": old["memory_id"],
+                        }
+                    )
+                    break
+    increment("memories_scanned", scanned, stage="link_revisions")
     return new_memories, revisions
 
 
+def store_merges(
+    near_duplicates: List[Dict[str, Any]],
+    existing_memories: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    wanted = {d["duplicate_of"] for d in near_duplicates if d["action"] == "merged"}
+    if not wanted:
+        return []
+    targets = {m["memory_id"]: m for m in existing_memories if m["memory_id"] in wanted}
+    merges: List[Dict[str, Any]] = []
+    for d in near_duplicates:
+        target = targets.get(d["duplicate_of"])
+        if d["action"] != "merged" or target is None:
+            continue
+        merges.append(
+            {
+                "memory_id": target["memory_id"],
+                "created_at": target.get("created_at"),
+                "merged": merge_entry(d, d["similarity"]),
+            }
+        )
+    return merges
+
+
 def run_memory_pipeline(
     raw_content: str,
     timestamp: str,
     source: str,
     existing_memories: List[Dict[str, Any]],
     profile: str = "default",
+    dedup: str = "off",
+    dedup_index: Optional[LSHIndex] = None,
+    dedup_batch: Optional[LSHIndex] = None,
+    detect_contradictions: bool = True,
 ) -> Dict[str, Any]:
     new_memories = extract_new_memories(raw_content, timestamp, source, profile=profile)
+    near_duplicates: List[Dict[str, Any]] = []
+    merges: List[Dict[str, Any]] = []
+    dedup_counts: Dict[str, Any] = {"policy": dedup, "flagged": 0, "merged": 0, "skipped": 0}
+    if dedup != "off":
+        if dedup_index is None:
+            dedup_index = LSHIndex()
+            dedup_index.extend(existing_memories)
+        new_memories, near_duplicates, dedup_counts = apply_dedup_policy(new_memories, dedup_index, dedup, batch=dedup_batch)
+        merges = store_merges(near_duplicates, existing_memories)
     new_memories, revisions = link_revisions(existing_memories, new_memories)
-    combined = list(existing_memories) + list(new_memories)
-    contradictions = group_contradictions(combined)
+    contradictions: List[Dict[str, Any]] = []
+    if detect_contradictions:
+        contradictions = group_contradictions(list(existing_memories) + list(new_memories))
     result = {
         "new_memories": new_memories,
         "revisions": revisions,
         "contradictions": contradictions,
+        "near_duplicates": near_duplicates,
+        "merges": merges,
+        "dedup": dedup_counts,
     }
     return result
@@ -1,27 +1,153 @@
 import json
 import os
-from typing import List, Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-def load_memories(path: str) -> List[Dict[str, Any]]:
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
+from change_feed import append_changes, memory_events, merge_events, contradiction_events
+from dedup import apply_merges
+from metrics import timed, increment
+from partitioned_store import (
+    is_partitioned_store,
+    load_partitioned,
+    save_partitioned,
+    append_partitioned,
+    merge_partitioned,
+    compress_cold_partitions,
+    manifest_path,
+    load_manifest,
+)
+
+
+_thread_locks: Dict[str, Any] = {}
+_thread_locks_guard = threading.Lock()
+_held_locks = threading.local()
+_cache: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+_cache_lock = threading.Lock()
+
+
+def lock_path(path: str) -> str:
+    if is_partitioned_store(path):
+        return os.path.join(path, ".lock")
+    return path + ".lock"
+
+
+@contextmanager
+def store_lock(path: str) -> Iterator[None]:
+    key = os.path.abspath(path)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.RLock())
+    with thread_lock:
+        held = getattr(_held_locks, "depths", None)
+        if held is None:
+            held = _held_locks.depths = {}
+        depth = held.get(key, 0)
+        lock_file = None
+        if depth == 0 and fcntl is not None:
+            directory = os.path.dirname(lock_path(path))
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            lock_file = open(lock_path(path), "a")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        held[key] = depth + 1
         try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            return []
-    if not isinstance(data, list):
-        return []
-    return data
+            yield
+        finally:
+            held[key] -= 1
+            if lock_file is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+
+
+def load_memories(path: str) -> List[Dict[str, Any]]:
+    with timed("load_memories"):
+        if is_partitioned_store(path):
+            data = load_partitioned(path)
+        else:
+            if not os.path.exists(path):
+                return []
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    return []
+                increment("bytes_read", f.tell(), stage="load_memories")
+            if not isinstance(data, list):
+                return []
+        increment("memories_scanned", len(data), stage="load_memories")
+        return data
+
+
+def load_memories_snapshot(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    with _cache_lock:
+        generation = store_generation(path)
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == generation:
+            return cached
+        memories = load_memories(path)
+        _cache[path] = (generation, memories)
+        return generation, memories
+
+
+def load_memories_cached(path: str) -> List[Dict[str, Any]]:
+    return load_memories_snapshot(path)[1]
+
+
+def cached_generation(path: str, memories: List[Dict[str, Any]]) -> Optional[str]:
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is None or cached[1] is not memories:
+        return None
+    return cached[0]
+
+
+def load_memories_pruned(
+    path: str,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    if is_partitioned_store(path):
+        return load_partitioned(path, start_iso=start_iso, end_iso=end_iso, topic=topic)
+    return load_memories_cached(path)
+
+
+def store_has_memories(path: str) -> bool:
+    if is_partitioned_store(path):
+        return any(entry.get("count") for entry in load_manifest(path)["partitions"].values())
+    return bool(load_memories(path))
 
 
 def save_memories(path: str, memories: List[Dict[str, Any]]) -> None:
-    directory = os.path.dirname(path)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(memories, f, ensure_ascii=False, indent=2)
+    with timed("save_memories"):
+        if is_partitioned_store(path):
+            save_partitioned(path, memories)
+            return
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(memories, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            increment("bytes_written", f.tell(), stage="save_memories")
+        os.replace(tmp_path, path)
+
+
+def store_generation(path: str) -> str:
+    if is_partitioned_store(path):
+        path = manifest_path(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "0"
+    return f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"
 
 
 def snapshot_memories(path: str, snapshot_dir: str) -> None:
@@ -40,13 +166,39 @@ def snapshot_memories(path: str, snapshot_dir: str) -> None:
         json.dump(memories, f, ensure_ascii=False, indent=2)
 
 
-def append_memories(path: str, new_memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    existing = load_memories(path)
-    combined = existing + list(new_memories)
-    save_memories(path, combined)
+def append_memories(
+    path: str,
+    new_memories: List[Dict[str, Any]],
+    contradictions: Optional[List[Dict[str, Any]]] = None,
+    record_changes: bool = True,
+    merges: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    with store_lock(path):
+        if is_partitioned_store(path):
+            append_partitioned(path, list(new_memories))
+            applied = merge_partitioned(path, merges) if merges else []
+            combined = load_memories(path)
+        else:
+            existing, applied = apply_merges(load_memories(path), merges or [])
+            combined = existing + list(new_memories)
+            save_memories(path, combined)
+        with _cache_lock:
+            _cache[path] = (store_generation(path), combined)
+        if record_changes:
+            new_ids = [m["memory_id"] for m in new_memories]
+            events = memory_events(new_memories) + merge_events(applied)
+            append_changes(path, events + contradiction_events(contradictions or [], new_ids))
     return combined
 
 
+def partition_memories(path: str, store_dir: str, keep_hot: int = 3) -> Dict[str, Any]:
+    memories = load_memories(path)
+    with store_lock(store_dir):
+        save_partitioned(store_dir, memories)
+        compressed = compress_cold_partitions(store_dir, keep_hot=keep_hot)
+    return {"total_memories": len(memories), "compressed_partitions": compressed}
+
+
 def filter_by_topic(memories: List[Dict[str, Any]], topic: str) -> List[Dict[str, Any]]:
     lower = topic.lower()
     result: List[Dict[str, Any]] = []
@@ -57,6 +209,27 @@ def filter_by_topic(memories: List[Dict[str, Any]], topic: str) -> List[Dict[str
     return result
 
 
+def build_topic_index(memories: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    index: Dict[str, List[int]] = {}
+    for position, m in enumerate(memories):
+        for t in {str(t).lower() for t in m.get("topic", [])}:
+            index.setdefault(t, []).append(position)
+    return index
+
+
+def lookup_topic(
+    index: Dict[str, List[int]],
+    memories: List[Dict[str, Any]],
+    topic: str,
+) -> List[Dict[str, Any]]:
+    lower = topic.lower()
+    positions = set()
+    for t, postings in index.items():
+        if lower == t or lower in t:
+            positions.update(postings)
+    return [memories[p] for p in sorted(positions)]
+
+
 def filter_by_time_range(
     memories: List[Dict[str, Any]],
     start_iso: str,
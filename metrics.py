@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+
+PREFIX = "mnemosyne"
+DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+HELP = {
+    "stage_seconds": "Time spent in an instrumented pipeline, store or answer stage.",
+    "http_request_seconds": "Time spent handling an HTTP request.",
+    "memories_scanned": "Memories visited by a stage.",
+    "pairs_compared": "Memory pairs compared by a stage.",
+    "bytes_read": "Bytes read from the store.",
+    "bytes_written": "Bytes written to the store.",
+    "http_requests": "HTTP requests received.",
+    "http_request_bytes_received": "Request body bytes received on the wire.",
+    "http_request_bytes_decoded": "Request body bytes after content decoding.",
+    "http_response_bytes_raw": "Response body bytes before compression.",
+    "http_response_bytes_sent": "Response body bytes sent on the wire.",
+    "http_not_modified": "Conditional requests answered with 304 Not Modified.",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_histograms: Dict[str, Dict[LabelKey, "Histogram"]] = {}
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_local = threading.local()
+
+
+class Histogram:
+    def __init__(self, buckets: Optional[List[float]] = None) -> None:
+        self.buckets = list(buckets or DEFAULT_BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    key = _label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+    collector = getattr(_local, "collector", None)
+    if collector is not None:
+        stage = labels.get("stage", "")
+        counters = collector["counters"].setdefault(name, {})
+        counters[stage] = counters.get(stage, 0) + value
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        observe("stage_seconds", seconds, stage=stage)
+        collector = getattr(_local, "collector", None)
+        if collector is not None:
+            stages = collector["stages"]
+            entry = stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+
+
+@contextmanager
+def collect_timings(enabled: bool = True) -> Iterator[Optional[Dict[str, Any]]]:
+    if not enabled:
+        yield None
+        return
+    previous = getattr(_local, "collector", None)
+    collector: Dict[str, Any] = {"total_seconds": 0.0, "stages": {}, "counters": {}}
+    _local.collector = collector
+    started = time.perf_counter()
+    try:
+        yield collector
+    finally:
+        collector["total_seconds"] = time.perf_counter() - started
+        _local.collector = previous
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "histograms": {
+                name: {
+                    key: {"count": h.count, "sum": h.total, "buckets": list(zip(h.buckets, h.counts))}
+                    for key, h in series.items()
+                }
+                for name, series in _histograms.items()
+            },
+            "counters": {name: dict(series) for name, series in _counters.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra is not None else [])
+    if not items:
+        return ""
+    escaped = [
+        f'{k}="' + v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for k, v in items
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(extra_counters: Optional[Dict[str, Dict[str, Dict[str, int]]]] = None) -> str:
+    data = snapshot()
+    lines: List[str] = []
+    for name in sorted(data["histograms"]):
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {metric} histogram")
+        for key in sorted(data["histograms"][name]):
+            h = data["histograms"][name][key]
+            cumulative = 0
+            for bound, count in h["buckets"]:
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(key, ('le', '+Inf'))} {h['count']}")
+            lines.append(f"{metric}_sum{_format_labels(key)} {_format_value(h['sum'])}")
+            lines.append(f"{metric}_count{_format_labels(key)} {h['count']}")
+    counters = dict(data["counters"])
+    for name, series in (extra_counters or {}).items():
+        for label_name, values in series.items():
+            for label_value, value in values.items():
+                counters.setdefault(name, {})[((label_name, label_value),)] = value
+    for name in sorted(counters):
+        metric = f"{PREFIX}_{name}_total"
+        lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {metric} counter")
+        for key in sorted(counters[name]):
+            lines.append(f"{metric}{_format_labels(key)} {_format_value(counters[name][key])}")
+    return "\n".join(lines) + "\n"
@@ -1,38 +1,186 @@
 import argparse
+import cProfile
+import json
+import os
+import sys
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
+from bulk_io import export_memories, import_memories
+from dedup import DEDUP_POLICIES
 from memory_pipeline import run_memory_pipeline
-from memory_store import load_memories, append_memories
-from mnemosyne_engine import answer_query
-from thinking_sessions import run_thinking_session
+from memory_store import (
+    load_memories,
+    load_memories_cached,
+    load_memories_pruned,
+    append_memories,
+    partition_memories,
+    store_has_memories,
+)
+from metrics import collect_timings
+from profiling import DEFAULT_TOP, format_profile, save_profile, summarize_profile
+from partitioned_store import compress_cold_partitions
+from mnemosyne_engine import (
+    Memory,
+    answer_query,
+    answer_query_structured,
+    answer_parsed_questions,
+    detect_time_mode,
+    parse_memories,
+    worker_pool,
+)
+from store_index import open_index, save_index, dedup_index
+from thinking_sessions import run_thinking_session, run_thinking_session_batch
 
 
-def run_ingest(text: str, source: str, timestamp: str, store_path: str, profile: str = "default") -> Dict[str, Any]:
+def run_ingest(
+    text: str,
+    source: str,
+    timestamp: str,
+    store_path: str,
+    profile: str = "default",
+    dedup: str = "off",
+    timings: bool = False,
+) -> Dict[str, Any]:
     if not timestamp:
         timestamp = datetime.utcnow().isoformat()
-    existing = load_memories(store_path)
-    result = run_memory_pipeline(text, timestamp, source, existing, profile=profile)
-    combined = append_memories(store_path, result["new_memories"])
+    with collect_timings(timings) as collected:
+        existing = load_memories(store_path)
+        shared_dedup = dedup_index(store_path, existing) if dedup != "off" else None
+        result = run_memory_pipeline(
+            text,
+            timestamp,
+            source,
+            existing,
+            profile=profile,
+            dedup=dedup,
+            dedup_index=shared_dedup,
+        )
+        combined = append_memories(
+            store_path,
+            result["new_memories"],
+            contradictions=result["contradictions"],
+            merges=result["merges"],
+        )
+        open_index(store_path, combined)
     summary = {
         "new_memories": result["new_memories"],
         "revisions": result["revisions"],
         "contradictions": result["contradictions"],
+        "near_duplicates": result["near_duplicates"],
+        "dedup": result["dedup"],
         "total_memories": len(combined),
     }
+    if collected is not None:
+        summary["timings"] = collected
     return summary
 
 
-def run_answer(question: str, store_path: str) -> Dict[str, Any]:
-    memories = load_memories(store_path)
+def load_memories_for_question(question: str, store_path: str) -> List[Dict[str, Any]]:
+    mode, payload = detect_time_mode(question)
+    if mode == "past" and payload is not None:
+        return load_memories_pruned(store_path, end_iso=payload[0].isoformat())
+    if mode == "range" and payload is not None:
+        start, end = payload
+        return load_memories_pruned(
+            store_path,
+            start_iso=start.isoformat(),
+            end_iso=end.isoformat() if end is not None else None,
+        )
+    return load_memories_cached(store_path)
+
+
+def run_answer(
+    question: str,
+    store_path: str,
+    output_format: str = "text",
+    timings: bool = False,
+) -> Dict[str, Any]:
+    with collect_timings(timings) as collected:
+        memories = load_memories_for_question(question, store_path)
+        if not memories and not store_has_memories(store_path):
+            result = {"has_memories": False, "answer": "No memories available in the store."}
+        elif output_format == "json":
+            result = {"has_memories": True, "result": answer_query_structured(memories, question)}
+        else:
+            result = {"has_memories": True, "answer": answer_query(memories, question)}
+    if collected is not None:
+        result["timings"] = collected
+    return result
+
+
+_batch_memories: List[Memory] = []
+
+
+def _init_batch_worker(raw_memories: List[Dict[str, Any]]) -> None:
+    global _batch_memories
+    _batch_memories = parse_memories(raw_memories)
+
+
+def _answer_batch_chunk(job: Tuple[List[int], List[str], str]) -> List[Tuple[int, Dict[str, Any]]]:
+    indexes, questions, output_format = job
+    results = answer_parsed_questions(_batch_memories, questions, output_format=output_format)
+    return list(zip(indexes, results))
+
+
+def run_answer_batch(
+    questions: List[str],
+    store_path: str,
+    output_format: str = "text",
+    workers: int = 0,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    memories = load_memories_cached(store_path)
     if not memories:
-        return {"has_memories": False, "answer": "No memories available in the store."}
-    output = answer_query(memories, question)
-    return {"has_memories": True, "answer": output}
+        return {
+            "has_memories": False,
+            "answer": "No memories available in the store.",
+            "results": [],
+            "seconds": time.perf_counter() - started,
+        }
+    if workers > 1 and len(questions) > 1:
+        groups: Dict[Any, List[int]] = {}
+        for index, question in enumerate(questions):
+            groups.setdefault(detect_time_mode(question), []).append(index)
+        buckets: List[List[int]] = [[] for _ in range(min(workers, len(questions)))]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(buckets, key=len).extend(group)
+        jobs = [(bucket, [questions[i] for i in bucket], output_format) for bucket in buckets if bucket]
+        ordered: List[Any] = [None] * len(questions)
+        with worker_pool(
+            len(jobs),
+            initializer=_init_batch_worker,
+            initargs=(memories,),
+        ) as pool:
+            for chunk in pool.map(_answer_batch_chunk, jobs):
+                for index, result in chunk:
+                    ordered[index] = result
+        results = ordered
+    else:
+        results = answer_parsed_questions(parse_memories(memories), questions, output_format=output_format)
+    return {"has_memories": True, "results": results, "seconds": time.perf_counter() - started}
+
+
+def print_timings(timings: Dict[str, Any]) -> None:
+    print(f"Timings ({timings['total_seconds']:.4f}s total):")
+    for stage, entry in sorted(timings["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {stage}: {entry['seconds']:.4f}s ({entry['calls']} calls)")
+    for name, stages in sorted(timings["counters"].items()):
+        for stage, value in sorted(stages.items()):
+            print(f"  {name}[{stage}]: {int(value)}")
 
 
 def ingest_command(args: argparse.Namespace) -> None:
-    summary = run_ingest(args.text, args.source, args.timestamp, args.store, profile=args.profile)
+    summary = run_ingest(
+        args.text,
+        args.source,
+        args.timestamp,
+        args.store,
+        profile=args.profile,
+        dedup=args.dedup,
+        timings=args.timings,
+    )
     print("New memories:")
     for m in summary["new_memories"]:
         print(m["memory_id"], m["created_at"], m["content"])
@@ -44,21 +192,136 @@ def ingest_command(args: argparse.Namespace) -> None:
         print("Contradictions:")
         for c in summary["contradictions"]:
             print("Topic:", c["topic"], "status:", c["status"])
+    if summary["near_duplicates"]:
+        print("Near-duplicates:")
+        for d in summary["near_duplicates"]:
+            print(d["memory_id"], d["action"], "as duplicate of", d["duplicate_of"], f"({d['similarity']:.2f})")
+    if summary["dedup"]["skipped"]:
+        print("Skipped near-duplicates:", summary["dedup"]["skipped"])
     print("Total memories in store:", summary["total_memories"])
+    if "timings" in summary:
+        print_timings(summary["timings"])
 
 
 def answer_command(args: argparse.Namespace) -> None:
-    result = run_answer(args.question, args.store)
-    print(result["answer"])
+    result = run_answer(args.question, args.store, output_format=args.format, timings=args.timings)
+    if "result" in result:
+        print(json.dumps(result["result"], ensure_ascii=False, indent=2))
+    else:
+        print(result["answer"])
+    if "timings" in result:
+        print_timings(result["timings"])
+
+
+def answer_batch_command(args: argparse.Namespace) -> None:
+    questions = list(args.question or [])
+    if args.questions_file:
+        with open(args.questions_file, "r", encoding="utf-8") as f:
+            questions.extend(line.strip() for line in f if line.strip())
+    result = run_answer_batch(questions, args.store, output_format=args.format, workers=args.workers)
+    if not result["has_memories"]:
+        print(result["answer"])
+        return
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for item in result["results"]:
+        print("Question:", item["question"], f"({item['seconds']:.4f}s)")
+        print(item["answer"])
+    print(f"Answered {len(result['results'])} questions in {result['seconds']:.4f}s")
+
+
+def print_topic_overview(overview: Dict[str, Any]) -> None:
+    types = ", ".join(f"{name} {count}" for name, count in sorted(overview["memory_types"].items()))
+    print(
+        f"Topic '{overview['topic']}': {overview['count']} memories ({types}), "
+        f"average confidence {overview['average_confidence']:.2f}, "
+        f"{len(overview['revision_heads'])} revision chains, {overview['contradictions']} contradictions"
+    )
+    latest = overview["latest"]
+    print(f"Latest [{latest['created_at']}]: {latest['content']}")
 
 
 def session_command(args: argparse.Namespace) -> None:
     result = run_thinking_session(args.topic, args.store, start_iso=args.start, end_iso=args.end)
+    if result["overview"]:
+        print_topic_overview(result["overview"])
     print(result["answer"])
 
 
+def session_batch_command(args: argparse.Namespace) -> None:
+    result = run_thinking_session_batch(
+        args.topics,
+        args.store,
+        start_iso=args.start,
+        end_iso=args.end,
+        since_iso=args.since,
+        workers=args.workers,
+    )
+    for session in result["sessions"]:
+        print("Topic:", session["topic"])
+        print(session["answer"])
+    print("Sessions run:", len(result["sessions"]))
+    print("Total memories in store:", result["total_memories"])
+
+
+def partition_command(args: argparse.Namespace) -> None:
+    result = partition_memories(args.store, args.dest, keep_hot=args.keep_hot)
+    print("Partitioned memories:", result["total_memories"])
+    print("Compressed partitions:", ", ".join(result["compressed_partitions"]) or "none")
+
+
+def compress_command(args: argparse.Namespace) -> None:
+    compressed = compress_cold_partitions(args.store, keep_hot=args.keep_hot)
+    print("Compressed partitions:", ", ".join(compressed) or "none")
+
+
+def print_transfer_report(report: Dict[str, Any]) -> None:
+    print("Read:", report["read"], "written:", report["written"], "invalid:", report["invalid"])
+    for error in report["errors"]:
+        print("Invalid record", error["position"], error["memory_id"] or "-", error["error"])
+    print(f"Throughput: {report['memories_per_second']:.0f} memories/s ({report['seconds']:.2f}s)")
+
+
+def export_command(args: argparse.Namespace) -> None:
+    report = export_memories(
+        args.store,
+        args.output,
+        fmt=args.format,
+        topic=args.topic,
+        start_iso=args.start,
+        end_iso=args.end,
+    )
+    print_transfer_report(report)
+
+
+def import_command(args: argparse.Namespace) -> None:
+    report = import_memories(
+        args.input,
+        args.store,
+        fmt=args.format,
+        topic=args.topic,
+        start_iso=args.start,
+        end_iso=args.end,
+    )
+    print_transfer_report(report)
+
+
+def index_command(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    index = open_index(args.store, persist=False)
+    if args.dedup:
+        index.dedup_index(load_memories_cached(args.store))
+    save_index(args.store, index)
+    print("Indexed memories:", index.count, "topics:", len(index.topics))
+    print(f"Index ready in {time.perf_counter() - started:.2f}s")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", dest="profile_run", action="store_true")
+    parser.add_argument("--profile-output")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP)
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     ingest = subparsers.add_parser("ingest")
@@ -67,13 +330,25 @@ def build_parser() -> argparse.ArgumentParser:
     ingest.add_argument("--source", required=True, choices=["note", "pdf", "tweet", "chat", "voice"])
     ingest.add_argument("--timestamp")
     ingest.add_argument("--profile", default="default", choices=["default", "journal", "research"])
+    ingest.add_argument("--dedup", default="off", choices=DEDUP_POLICIES)
+    ingest.add_argument("--timings", action="store_true")
     ingest.set_defaults(func=ingest_command)
 
     answer = subparsers.add_parser("answer")
     answer.add_argument("--store", required=True)
     answer.add_argument("--question", required=True)
+    answer.add_argument("--format", default="text", choices=["text", "json"])
+    answer.add_argument("--timings", action="store_true")
     answer.set_defaults(func=answer_command)
 
+    answer_batch = subparsers.add_parser("answer-batch")
+    answer_batch.add_argument("--store", required=True)
+    answer_batch.add_argument("--question", action="append")
+    answer_batch.add_argument("--questions-file")
+    answer_batch.add_argument("--format", default="text", choices=["text", "json"])
+    answer_batch.add_argument("--workers", type=int, default=0)
+    answer_batch.set_defaults(func=answer_batch_command)
+
     session = subparsers.add_parser("session")
     session.add_argument("--store", required=True)
     session.add_argument("--topic", required=True)
@@ -81,6 +356,50 @@ def build_parser() -> argparse.ArgumentParser:
     session.add_argument("--end")
     session.set_defaults(func=session_command)
 
+    session_batch = subparsers.add_parser("session-batch")
+    session_batch.add_argument("--store", required=True)
+    topics_group = session_batch.add_mutually_exclusive_group(required=True)
+    topics_group.add_argument("--topics", nargs="+")
+    topics_group.add_argument("--since")
+    session_batch.add_argument("--start")
+    session_batch.add_argument("--end")
+    session_batch.add_argument("--workers", type=int, default=0)
+    session_batch.set_defaults(func=session_batch_command)
+
+    index = subparsers.add_parser("index")
+    index.add_argument("--store", required=True)
+    index.add_argument("--dedup", action="store_true")
+    index.set_defaults(func=index_command)
+
+    partition = subparsers.add_parser("partition")
+    partition.add_argument("--store", required=True)
+    partition.add_argument("--dest", required=True)
+    partition.add_argument("--keep-hot", type=int, default=3)
+    partition.set_defaults(func=partition_command)
+
+    compress = subparsers.add_parser("compress-partitions")
+    compress.add_argument("--store", required=True)
+    compress.add_argument("--keep-hot", type=int, default=3)
+    compress.set_defaults(func=compress_command)
+
+    export = subparsers.add_parser("export")
+    export.add_argument("--store", required=True)
+    export.add_argument("--output", required=True)
+    export.add_argument("--format", default="jsonl", choices=["jsonl", "json"])
+    export.add_argument("--topic")
+    export.add_argument("--start")
+    export.add_argument("--end")
+    export.set_defaults(func=export_command)
+
+    import_ = subparsers.add_parser("import")
+    import_.add_argument("--store", required=True)
+    import_.add_argument("--input", required=True)
+    import_.add_argument("--format", default="auto", choices=["auto", "jsonl", "json"])
+    import_.add_argument("--topic")
+    import_.add_argument("--start")
+    import_.add_argument("--end")
+    import_.set_defaults(func=import_command)
+
     return parser
 
 
@@ -91,7 +410,22 @@ def main() -> None:
     if func is None:
         parser.print_help()
         return
-    func(args)
+    if not args.profile_run:
+        func(args)
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        func(args)
+    finally:
+        profiler.disable()
+        report = summarize_profile(profiler, args.profile_top)
+        report["request"] = args.command
+        if args.profile_output:
+            directory = os.path.dirname(args.profile_output) or "."
+            profile_id = os.path.splitext(os.path.basename(args.profile_output))[0]
+            report["saved_to"] = save_profile(profiler, report, directory, profile_id)
+        print(format_profile(report), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,15 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import re
+import time
+
+from metrics import timed, increment
+
+
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
 
 @dataclass
@@ -34,7 +42,10 @@ def parse_memory(raw: Dict[str, Any]) -> Memory:
 
 
 def parse_memories(raw_list: List[Dict[str, Any]]) -> List[Memory]:
-    return [parse_memory(raw) for raw in raw_list]
+    with timed("parse_memories"):
+        memories = [parse_memory(raw) for raw in raw_list]
+    increment("memories_scanned", len(raw_list), stage="parse_memories")
+    return memories
 
 
 def detect_time_mode(question: str) -> Tuple[str, Optional[Tuple[datetime, Optional[datetime]]]]:
@@ -99,65 +110,106 @@ def build_revision_chains(memories: List[Memory]) -> Dict[str, List[Memory]]:
     return chains
 
 
-def format_answer_section(selected: List[Memory], mode: str, ambiguous_time: bool) -> str:
+def answer_preamble(selected: List[Memory], mode: str) -> List[str]:
     if not selected:
-        return "I don’t have enough memory to answer this confidently."
-    lines: List[str] = []
+        return ["I don’t have enough memory to answer this confidently."]
     if mode == "past":
-        lines.append("Answer is based on memories available up to the requested time.")
-    elif mode == "range":
-        lines.append("Answer is based on memories within the requested time range.")
-    elif mode == "past_ambiguous":
-        lines.append("Time reference in the question is ambiguous; using all available memories.")
-        lines.append("Clarifying question: Which exact date or time boundary should be applied?")
-    else:
-        lines.append("Answer is based on the latest available relevant memories.")
+        return ["Answer is based on memories available up to the requested time."]
+    if mode == "range":
+        return ["Answer is based on memories within the requested time range."]
+    if mode == "past_ambiguous":
+        return [
+            "Time reference in the question is ambiguous; using all available memories.",
+            "Clarifying question: Which exact date or time boundary should be applied?",
+        ]
+    return ["Answer is based on the latest available relevant memories."]
+
+
+def iter_answer_lines(selected: List[Memory], mode: str) -> Iterator[str]:
+    yield from answer_preamble(selected, mode)
     for m in selected:
-        lines.append(f"- [{m.created_at.isoformat()}] {m.content}")
-    return "\n".join(lines)
+        yield f"- [{m.created_at.isoformat()}] {m.content}"
 
 
-def format_belief_evolution_section(selected: List[Memory]) -> str:
-    if not selected:
-        return "No significant belief change detected."
+def format_answer_section(selected: List[Memory], mode: str, ambiguous_time: bool) -> str:
+    return "\n".join(iter_answer_lines(selected, mode))
+
+
+def describe_belief_evolution(selected: List[Memory]) -> List[Dict[str, Any]]:
     chains = build_revision_chains(selected)
-    descriptive_lines: List[str] = []
+    evolution: List[Dict[str, Any]] = []
     for root, chain in chains.items():
         if len(chain) < 2:
             continue
         first = chain[0]
         last = chain[-1]
-        topics = ", ".join(last.topic) if last.topic else "unspecified topics"
-        descriptive_lines.append(
-            f"For {topics}, memory {first.memory_id} ({first.created_at.isoformat()}) "
-            f"is revised by {last.memory_id} ({last.created_at.isoformat()})."
+        evolution.append(
+            {
+                "root": root,
+                "topic": list(last.topic),
+                "first_memory_id": first.memory_id,
+                "first_created_at": first.created_at.isoformat(),
+                "last_memory_id": last.memory_id,
+                "last_created_at": last.created_at.isoformat(),
+                "chain": [m.memory_id for m in chain],
+            }
         )
-    if not descriptive_lines:
-        return "No significant belief change detected."
-    return "\n".join(descriptive_lines)
+    return evolution
 
 
-def format_memories_used_section(selected: List[Memory], mode: str) -> str:
+def iter_belief_evolution_lines(selected: List[Memory]) -> Iterator[str]:
+    evolution = describe_belief_evolution(selected)
+    if not evolution:
+        yield "No significant belief change detected."
+        return
+    for item in evolution:
+        topics = ", ".join(item["topic"]) if item["topic"] else "unspecified topics"
+        yield (
+            f"For {topics}, memory {item['first_memory_id']} ({item['first_created_at']}) "
+            f"is revised by {item['last_memory_id']} ({item['last_created_at']})."
+        )
+
+
+def format_belief_evolution_section(selected: List[Memory]) -> str:
+    return "\n".join(iter_belief_evolution_lines(selected))
+
+
+def describe_memory_used(m: Memory, mode: str) -> Dict[str, Any]:
+    reason = "Time-filtered relevant memory" if mode in ["past", "past_ambiguous", "range"] else "Relevant memory"
+    if m.topic:
+        reason += f" for topics {', '.join(m.topic)}"
+    return {
+        "memory_id": m.memory_id,
+        "created_at": m.created_at.isoformat(),
+        "confidence": m.confidence,
+        "topic": list(m.topic),
+        "reason": reason,
+    }
+
+
+def iter_memories_used_lines(selected: List[Memory], mode: str) -> Iterator[str]:
     if not selected:
-        return "- None | N/A | N/A | No memory context was sufficient to answer."
-    lines: List[str] = []
-    time_reason = "Time-filtered relevant memory" if mode in ["past", "past_ambiguous", "range"] else "Relevant memory"
+        yield "- None | N/A | N/A | No memory context was sufficient to answer."
+        return
     for m in selected:
-        reason = time_reason
-        if m.topic:
-            reason += f" for topics {', '.join(m.topic)}"
-        lines.append(
-            f"- {m.memory_id} | {m.created_at.isoformat()} | {m.confidence:.2f} | {reason}"
-        )
-    return "\n".join(lines)
+        used = describe_memory_used(m, mode)
+        yield f"- {used['memory_id']} | {used['created_at']} | {used['confidence']:.2f} | {used['reason']}"
 
 
-def format_confidence_note(selected: List[Memory]) -> str:
+def format_memories_used_section(selected: List[Memory], mode: str) -> str:
+    return "\n".join(iter_memories_used_lines(selected, mode))
+
+
+def describe_confidence(selected: List[Memory]) -> Dict[str, Any]:
     if not selected:
-        return (
-            "Confidence is low. No relevant memories were found for the question. "
-            "Additional, more specific memories would be required."
-        )
+        return {
+            "level": "low",
+            "average": None,
+            "note": (
+                "Confidence is low. No relevant memories were found for the question. "
+                "Additional, more specific memories would be required."
+            ),
+        }
     avg_conf = sum(m.confidence for m in selected) / len(selected)
     if avg_conf >= 0.75:
         level = "high"
@@ -165,35 +217,142 @@ def format_confidence_note(selected: List[Memory]) -> str:
         level = "moderate"
     else:
         level = "low"
-    return (
-        f"Confidence is {level}. This reflects the average confidence value of the "
-        f"selected memories ({avg_conf:.2f}) and their direct relevance to the question."
-    )
+    return {
+        "level": level,
+        "average": avg_conf,
+        "note": (
+            f"Confidence is {level}. This reflects the average confidence value of the "
+            f"selected memories ({avg_conf:.2f}) and their direct relevance to the question."
+        ),
+    }
 
 
-def answer_query(raw_memories: List[Dict[str, Any]], question: str) -> str:
+def format_confidence_note(selected: List[Memory]) -> str:
+    return describe_confidence(selected)["note"]
+
+
+def select_for_question(raw_memories: List[Dict[str, Any]], question: str) -> Tuple[str, List[Memory]]:
     memories = parse_memories(raw_memories)
-    mode, payload = detect_time_mode(question)
-    time_filtered = filter_by_time(memories, mode, payload)
-    selected = select_relevant_memories(time_filtered, question)
-    answer_section = format_answer_section(selected, mode, mode == "past_ambiguous")
-    belief_evolution_section = format_belief_evolution_section(selected)
-    memories_used_section = format_memories_used_section(selected, mode)
-    confidence_note = format_confidence_note(selected)
-    parts = [
-        "---",
-        "ANSWER:",
-        answer_section,
-        "",
-        "BELIEF EVOLUTION:",
-        belief_evolution_section,
-        "",
-        "MEMORIES USED:",
-        memories_used_section,
-        "",
-        "CONFIDENCE NOTE:",
-        confidence_note,
-        "---",
-    ]
-    return "\n".join(parts)
+    with timed("select_memories"):
+        mode, payload = detect_time_mode(question)
+        time_filtered = filter_by_time(memories, mode, payload)
+        selected = select_relevant_memories(time_filtered, question)
+    return mode, selected
+
+
+def iter_answer_document(selected: List[Memory], mode: str) -> Iterator[str]:
+    yield "---"
+    yield "ANSWER:"
+    yield from iter_answer_lines(selected, mode)
+    yield ""
+    yield "BELIEF EVOLUTION:"
+    yield from iter_belief_evolution_lines(selected)
+    yield ""
+    yield "MEMORIES USED:"
+    yield from iter_memories_used_lines(selected, mode)
+    yield ""
+    yield "CONFIDENCE NOTE:"
+    yield format_confidence_note(selected)
+    yield "---"
+
+
+def stream_answer_query(raw_memories: List[Dict[str, Any]], question: str) -> Iterator[str]:
+    mode, selected = select_for_question(raw_memories, question)
+    lines = iter_answer_document(selected, mode)
+    previous = next(lines)
+    for line in lines:
+        yield previous + "\n"
+        previous = line
+    yield previous
+
+
+def build_answer_result(selected: List[Memory], mode: str) -> Dict[str, Any]:
+    return {
+        "mode": mode,
+        "answer": {
+            "preamble": answer_preamble(selected, mode),
+            "lines": [
+                {
+                    "memory_id": m.memory_id,
+                    "created_at": m.created_at.isoformat(),
+                    "content": m.content,
+                }
+                for m in selected
+            ],
+        },
+        "belief_evolution": describe_belief_evolution(selected),
+        "memories_used": [describe_memory_used(m, mode) for m in selected],
+        "confidence": describe_confidence(selected),
+    }
+
+
+def answer_query_structured(raw_memories: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
+    mode, selected = select_for_question(raw_memories, question)
+    with timed("format_answer"):
+        return build_answer_result(selected, mode)
+
 
+def iter_answer_events(raw_memories: List[Dict[str, Any]], question: str) -> Iterator[Dict[str, Any]]:
+    mode, selected = select_for_question(raw_memories, question)
+    yield {"type": "section", "name": "answer", "mode": mode, "preamble": answer_preamble(selected, mode)}
+    for m in selected:
+        yield {
+            "type": "answer_line",
+            "memory_id": m.memory_id,
+            "created_at": m.created_at.isoformat(),
+            "content": m.content,
+        }
+    yield {"type": "section", "name": "belief_evolution"}
+    for item in describe_belief_evolution(selected):
+        yield dict(item, type="evolution")
+    yield {"type": "section", "name": "memories_used"}
+    for m in selected:
+        yield dict(describe_memory_used(m, mode), type="memory_used")
+    yield dict(describe_confidence(selected), type="confidence")
+
+
+def render_answer(selected: List[Memory], mode: str, output_format: str = "text") -> Any:
+    with timed("format_answer"):
+        if output_format == "json":
+            return build_answer_result(selected, mode)
+        return "\n".join(iter_answer_document(selected, mode))
+
+
+def answer_parsed_questions(
+    memories: List[Memory],
+    questions: List[str],
+    output_format: str = "text",
+) -> List[Dict[str, Any]]:
+    views: Dict[Tuple[str, Any], List[Memory]] = {}
+    key_name = "result" if output_format == "json" else "answer"
+    results: List[Dict[str, Any]] = []
+    for question in questions:
+        started = time.perf_counter()
+        mode, payload = detect_time_mode(question)
+        view_key = (mode, payload)
+        if view_key not in views:
+            views[view_key] = filter_by_time(memories, mode, payload)
+        selected = select_relevant_memories(views[view_key], question)
+        results.append(
+            {
+                "question": question,
+                "mode": mode,
+                key_name: render_answer(selected, mode, output_format),
+                "seconds": time.perf_counter() - started,
+            }
+        )
+    return results
+
+
+def answer_query(raw_memories: List[Dict[str, Any]], question: str) -> str:
+    mode, selected = select_for_question(raw_memories, question)
+    with timed("format_answer"):
+        return "\n".join(iter_answer_document(selected, mode))
+
+
+def worker_pool(max_workers: int, **kwargs: Any) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(POOL_START_METHOD),
+        **kwargs,
+    )
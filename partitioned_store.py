@@ -0,0 +1,218 @@
+import gzip
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from dedup import apply_merges
+from metrics import increment
+
+
+MANIFEST_NAME = "manifest.json"
+UNDATED_PARTITION = "undated"
+
+_cold_cache: Dict[str, Tuple[Tuple[int, int], List[Dict[str, Any]]]] = {}
+_cold_cache_lock = threading.Lock()
+
+
+def is_partitioned_store(path: str) -> bool:
+    return os.path.isdir(path)
+
+
+def partition_key(memory: Dict[str, Any]) -> str:
+    created_at = memory.get("created_at")
+    if not created_at or len(created_at) < 7:
+        return UNDATED_PARTITION
+    return created_at[:7]
+
+
+def manifest_path(store_dir: str) -> str:
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def load_manifest(store_dir: str) -> Dict[str, Any]:
+    path = manifest_path(store_dir)
+    if not os.path.exists(path):
+        return {"version": 1, "partitions": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError:
+            return {"version": 1, "partitions": {}}
+    manifest.setdefault("partitions", {})
+    return manifest
+
+
+def _replace_file(path: str, data: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_manifest(store_dir: str, manifest: Dict[str, Any]) -> None:
+    data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8")
+    _replace_file(manifest_path(store_dir), data)
+
+
+def describe_partition(memories: List[Dict[str, Any]], filename: str, compressed: bool) -> Dict[str, Any]:
+    stamps = [m["created_at"] for m in memories if m.get("created_at")]
+    topics = set()
+    for m in memories:
+        for t in m.get("topic", []):
+            topics.add(str(t).lower())
+    return {
+        "file": filename,
+        "compressed": compressed,
+        "count": len(memories),
+        "min_created_at": min(stamps) if stamps else None,
+        "max_created_at": max(stamps) if stamps else None,
+        "topics": sorted(topics),
+    }
+
+
+def read_partition(store_dir: str, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    path = os.path.join(store_dir, entry["file"])
+    if not os.path.exists(path):
+        return []
+    if not entry.get("compressed"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            increment("bytes_read", f.tell(), stage="read_partition")
+        return data if isinstance(data, list) else []
+    with _cold_cache_lock:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = _cold_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return list(cached[1])
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        increment("bytes_read", st.st_size, stage="read_partition")
+        if not isinstance(data, list):
+            data = []
+        _cold_cache[path] = (signature, data)
+        return list(data)
+
+
+def write_partition(
+    store_dir: str,
+    key: str,
+    memories: List[Dict[str, Any]],
+    compressed: bool = False,
+) -> Dict[str, Any]:
+    filename = f"{key}.json.gz" if compressed else f"{key}.json"
+    if compressed:
+        data = gzip.compress(json.dumps(memories, ensure_ascii=False).encode("utf-8"))
+    else:
+        data = json.dumps(memories, ensure_ascii=False, indent=2).encode("utf-8")
+    _replace_file(os.path.join(store_dir, filename), data)
+    increment("bytes_written", len(data), stage="write_partition")
+    return describe_partition(memories, filename, compressed)
+
+
+def partition_may_match(
+    entry: Dict[str, Any],
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> bool:
+    if start_iso is not None and entry.get("max_created_at") is not None:
+        if entry["max_created_at"] < start_iso:
+            return False
+    if end_iso is not None and entry.get("min_created_at") is not None:
+        if entry["min_created_at"] > end_iso:
+            return False
+    if topic:
+        lower = topic.lower()
+        if not any(lower in t for t in entry.get("topics", [])):
+            return False
+    return True
+
+
+def load_partitioned(
+    store_dir: str,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    topic: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    manifest = load_manifest(store_dir)
+    memories: List[Dict[str, Any]] = []
+    for key in sorted(manifest["partitions"]):
+        entry = manifest["partitions"][key]
+        if not partition_may_match(entry, start_iso, end_iso, topic):
+            continue
+        memories.extend(read_partition(store_dir, entry))
+    return memories
+
+
+def group_by_partition(memories: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for m in memories:
+        groups.setdefault(partition_key(m), []).append(m)
+    return groups
+
+
+def append_partitioned(store_dir: str, new_memories: List[Dict[str, Any]]) -> None:
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    for key, group in group_by_partition(list(new_memories)).items():
+        entry = manifest["partitions"].get(key)
+        compressed = bool(entry and entry.get("compressed"))
+        existing = read_partition(store_dir, entry) if entry else []
+        manifest["partitions"][key] = write_partition(store_dir, key, existing + group, compressed=compressed)
+    save_manifest(store_dir, manifest)
+
+
+def merge_partitioned(store_dir: str, merges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    manifest = load_manifest(store_dir)
+    applied: List[Dict[str, Any]] = []
+    by_partition: Dict[str, List[Dict[str, Any]]] = {}
+    for merge in merges:
+        by_partition.setdefault(partition_key(merge), []).append(merge)
+    for key, group in by_partition.items():
+        entry = manifest["partitions"].get(key)
+        if entry is None:
+            continue
+        memories, done = apply_merges(read_partition(store_dir, entry), group)
+        if done:
+            manifest["partitions"][key] = write_partition(store_dir, key, memories, compressed=bool(entry.get("compressed")))
+            applied.extend(done)
+    if applied:
+        save_manifest(store_dir, manifest)
+    return applied
+
+
+def save_partitioned(store_dir: str, memories: List[Dict[str, Any]]) -> None:
+    os.makedirs(store_dir, exist_ok=True)
+    previous = load_manifest(store_dir)
+    manifest: Dict[str, Any] = {"version": 1, "partitions": {}}
+    for key, group in group_by_partition(memories).items():
+        compressed = bool(previous["partitions"].get(key, {}).get("compressed"))
+        manifest["partitions"][key] = write_partition(store_dir, key, group, compressed=compressed)
+    save_manifest(store_dir, manifest)
+    for key, entry in previous["partitions"].items():
+        current = manifest["partitions"].get(key)
+        if current is None or current["file"] != entry["file"]:
+            stale = os.path.join(store_dir, entry["file"])
+            if os.path.exists(stale):
+                os.remove(stale)
+
+
+def compress_cold_partitions(store_dir: str, keep_hot: int = 3) -> List[str]:
+    manifest = load_manifest(store_dir)
+    keys = sorted(k for k in manifest["partitions"] if k != UNDATED_PARTITION)
+    cold = keys[:-keep_hot] if keep_hot > 0 else keys
+    compressed: List[str] = []
+    for key in cold:
+        entry = manifest["partitions"][key]
+        if entry.get("compressed"):
+            continue
+        memories = read_partition(store_dir, entry)
+        manifest["partitions"][key] = write_partition(store_dir, key, memories, compressed=True)
+        save_manifest(store_dir, manifest)
+        os.remove(os.path.join(store_dir, entry["file"]))
+        compressed.append(key)
+    return compressed
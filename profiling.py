@@ -0,0 +1,120 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+PROFILE_HEADER = "X-Mnemosyne-Profile"
+PROFILE_ID_HEADER = "X-Mnemosyne-Profile-Id"
+DEFAULT_PROFILE_DIR = "data/profiles"
+DEFAULT_TOP = 25
+DEFAULT_MIN_INTERVAL = 10.0
+TRUE_VALUES = ["1", "true", "yes", "on"]
+
+
+def profile_requested(header_value: Optional[str], path: str) -> bool:
+    if header_value is not None and header_value.strip().lower() in TRUE_VALUES:
+        return True
+    values = parse_qs(urlsplit(path).query).get("profile", [])
+    return any(v.strip().lower() in TRUE_VALUES for v in values)
+
+
+def summarize_profile(profiler: cProfile.Profile, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows: List[Dict[str, Any]] = []
+    for (filename, line, name), (primitive, calls, total, cumulative, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "primitive_calls": primitive,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            }
+        )
+    rows.sort(key=lambda r: r["cumulative_seconds"], reverse=True)
+    return {
+        "total_calls": stats.total_calls,
+        "profiled_seconds": stats.total_tt,
+        "functions": rows[:top],
+    }
+
+
+def save_profile(profiler: cProfile.Profile, report: Dict[str, Any], output_dir: str, profile_id: str) -> str:
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, profile_id)
+    profiler.dump_stats(base + ".prof")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return base + ".json"
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        output_dir: Optional[str] = DEFAULT_PROFILE_DIR,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        top: int = DEFAULT_TOP,
+    ) -> None:
+        self.output_dir = output_dir
+        self.min_interval = min_interval
+        self.top = top
+        self.lock = threading.Lock()
+        self.active = False
+        self.last_started: Optional[float] = None
+
+    def start(self) -> Tuple[Optional[cProfile.Profile], Optional[str]]:
+        with self.lock:
+            now = time.monotonic()
+            if self.active:
+                return None, "Another request is being profiled."
+            if self.last_started is not None and now - self.last_started < self.min_interval:
+                wait = self.min_interval - (now - self.last_started)
+                return None, f"Profiling rate limit exceeded; retry in {wait:.1f}s."
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return None, "Another profiler is already active in this process."
+            self.active = True
+            self.last_started = now
+            return profiler, None
+
+    def finish(self, profiler: cProfile.Profile, profile_id: str, label: str) -> Dict[str, Any]:
+        profiler.disable()
+        try:
+            report = summarize_profile(profiler, self.top)
+            report["profile_id"] = profile_id
+            report["request"] = label
+            if self.output_dir:
+                report["saved_to"] = save_profile(profiler, report, self.output_dir, profile_id)
+            return report
+        finally:
+            with self.lock:
+                self.active = False
+
+
+def new_profile_id() -> str:
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:8]
+
+
+def format_profile(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Profile {report.get('profile_id') or report.get('request', '')}: {report['total_calls']} calls, "
+        f"{report['profiled_seconds']:.4f}s",
+        f"{'cumulative':>12} {'total':>10} {'calls':>9}  function",
+    ]
+    for row in report["functions"]:
+        lines.append(
+            f"{row['cumulative_seconds']:>12.4f} {row['total_seconds']:>10.4f} {row['calls']:>9}  {row['function']}"
+        )
+    if report.get("saved_to"):
+        lines.append(f"Saved to {report['saved_to']}")
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+import sys
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from change_feed import changes_size, wait_for_changes
+from dedup import apply_merges
+from memory_store import load_memories, store_lock
+from mnemosyne_engine import Memory, answer_parsed_questions, parse_memories
+from store_index import StoreIndex
+
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+class StoreReplica:
+    def __init__(self, store_path: str, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.store_path = store_path
+        self.poll_interval = poll_interval
+        self.lock = threading.RLock()
+        self.memories: List[Dict[str, Any]] = []
+        self.parsed: List[Memory] = []
+        self.index = StoreIndex()
+        self.cursor = 0
+        self.applied_events = 0
+        self.reloads = 0
+        self.last_committed_at: Optional[str] = None
+        self.caught_up_at = time.monotonic()
+        self.healthy = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def bootstrap(self) -> None:
+        with store_lock(self.store_path):
+            memories = load_memories(self.store_path)
+            cursor = changes_size(self.store_path)
+        index = StoreIndex()
+        index.extend(memories)
+        parsed = parse_memories(memories)
+        with self.lock:
+            self.memories = memories
+            self.parsed = parsed
+            self.index = index
+            self.cursor = cursor
+            self.reloads += 1
+            self.caught_up_at = time.monotonic()
+            self.healthy = True
+
+    def start(self) -> "StoreReplica":
+        self.bootstrap()
+        self._thread = threading.Thread(target=self._run, name="store-replica", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self.healthy:
+                    self.poll(self.poll_interval)
+                else:
+                    self.bootstrap()
+            except Exception as exc:
+                self.fail(exc)
+                self._stopping.wait(self.poll_interval)
+
+    def fail(self, exc: Exception) -> None:
+        with self.lock:
+            self.healthy = False
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+        sys.stderr.write(f"replica {self.store_path}: {self.last_error}; re-bootstrapping\n")
+
+    def poll(self, timeout: float = 0.0) -> int:
+        events, cursor = wait_for_changes(self.store_path, self.cursor, timeout)
+        if not events:
+            if cursor == changes_size(self.store_path):
+                self.caught_up_at = time.monotonic()
+            return 0
+        self.apply(events, cursor)
+        return len(events)
+
+    def apply(self, events: List[Dict[str, Any]], cursor: int) -> None:
+        if any(e["type"] == "reset" for e in events):
+            self.bootstrap()
+            return
+        new_memories = [e["memory"] for e in events if e["type"] == "memory"]
+        merges = [e for e in events if e["type"] == "merge"]
+        parsed = parse_memories(new_memories)
+        with self.lock:
+            self.index.extend(new_memories)
+            self.memories = apply_merges(self.memories + new_memories, merges)[0]
+            self.parsed = self.parsed + parsed
+            self.cursor = cursor
+            self.applied_events += len(events)
+            self.last_committed_at = events[-1].get("committed_at")
+            if cursor >= changes_size(self.store_path):
+                self.caught_up_at = time.monotonic()
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], List[Memory]]:
+        with self.lock:
+            return self.memories, self.parsed
+
+    def answer(self, question: str, output_format: str = "text") -> Dict[str, Any]:
+        _, parsed = self.snapshot()
+        if not parsed:
+            return {"has_memories": False, "answer": "No memories available in the store."}
+        item = answer_parsed_questions(parsed, [question], output_format=output_format)[0]
+        key = "result" if output_format == "json" else "answer"
+        return {"has_memories": True, key: item[key]}
+
+    def answer_batch(self, questions: List[str], output_format: str = "text") -> Dict[str, Any]:
+        started = time.perf_counter()
+        _, parsed = self.snapshot()
+        if not parsed:
+            return {
+                "has_memories": False,
+                "answer": "No memories available in the store.",
+                "results": [],
+                "seconds": time.perf_counter() - started,
+            }
+        results = answer_parsed_questions(parsed, questions, output_format=output_format)
+        return {"has_memories": True, "results": results, "seconds": time.perf_counter() - started}
+
+    def timeline(self, topic: str = "") -> List[Dict[str, Any]]:
+        with self.lock:
+            memories = self.memories
+            positions = self.index.timeline_positions(topic)
+        return [memories[p] for p in positions if p < len(memories)]
+
+    def list_topics(
+        self,
+        sort: str = "count",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50,
+        prefix: str = "",
+    ) -> Dict[str, Any]:
+        with self.lock:
+            return self.index.list_topics(sort=sort, descending=descending, offset=offset, limit=limit, prefix=prefix)
+
+    def generation(self) -> str:
+        return f"replica-{self.reloads}-{self.cursor:x}"
+
+    def lag(self) -> Dict[str, Any]:
+        behind = max(changes_size(self.store_path) - self.cursor, 0)
+        seconds = 0.0 if behind == 0 else time.monotonic() - self.caught_up_at
+        return {
+            "replication_lag_seconds": seconds,
+            "replication_lag_bytes": behind,
+            "cursor": self.cursor,
+            "applied_events": self.applied_events,
+            "last_committed_at": self.last_committed_at,
+            "total_memories": len(self.memories),
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,290 @@
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from dedup import LSHIndex
+from memory_pipeline import contradiction_class
+from memory_store import cached_generation, load_memories_cached, load_memories_snapshot, store_generation
+from partitioned_store import is_partitioned_store
+
+
+INDEX_VERSION = 3
+SAVE_EVERY = 256
+INSORT_LIMIT = 64
+TOPIC_SORT_KEYS = ["count", "latest", "topic", "confidence", "contradictions"]
+
+_open_indexes: Dict[str, "StoreIndex"] = {}
+_open_indexes_lock = threading.RLock()
+
+
+def index_path(store_path: str) -> str:
+    if is_partitioned_store(store_path):
+        return os.path.join(store_path, "index.json.gz")
+    return store_path + ".idx.json.gz"
+
+
+def chain_digest(previous: str, memory_id: str) -> str:
+    return hashlib.sha1((previous + "\x00" + memory_id).encode("utf-8")).hexdigest()
+
+
+class StoreIndex:
+    def __init__(self) -> None:
+        self.count = 0
+        self.digest = ""
+        self.last_memory_id: Optional[str] = None
+        self.generation = ""
+        self.topics: Dict[str, List[int]] = {}
+        self.time_order: List[Tuple[str, int]] = []
+        self.revision_roots: Dict[str, str] = {}
+        self.topic_summaries: Dict[str, Dict[str, Any]] = {}
+        self.dedup: Optional[LSHIndex] = None
+        self.unsaved = 0
+
+    def extend(self, memories: List[Dict[str, Any]]) -> int:
+        bulk = len(memories) > INSORT_LIMIT
+        for m in memories:
+            position = self.count
+            memory_id = m["memory_id"]
+            created_at = m.get("created_at")
+            if created_at is not None:
+                if bulk:
+                    self.time_order.append((created_at, position))
+                else:
+                    bisect.insort(self.time_order, (created_at, position))
+            revision_of = m.get("revision_of")
+            self.revision_roots[memory_id] = self.revision_roots.get(revision_of, memory_id) if revision_of else memory_id
+            for t in {str(t).lower() for t in m.get("topic", [])}:
+                self.topics.setdefault(t, []).append(position)
+                self._summarize(t, m)
+            if self.dedup is not None:
+                self.dedup.add_memory(m)
+            self.digest = chain_digest(self.digest, memory_id)
+            self.last_memory_id = memory_id
+            self.count += 1
+        if bulk:
+            self.time_order.sort()
+        self.unsaved += len(memories)
+        return len(memories)
+
+    def _summarize(self, topic: str, m: Dict[str, Any]) -> None:
+        if m.get("source") == "session":
+            return
+        summary = self.topic_summaries.get(topic)
+        if summary is None:
+            summary = self.topic_summaries[topic] = {
+                "count": 0,
+                "latest": None,
+                "memory_types": {},
+                "confidence_total": 0.0,
+                "revision_heads": {},
+                "classes": {},
+                "contradictions": 0,
+            }
+        kind = contradiction_class(m)
+        summary["contradictions"] += summary["count"] - summary["classes"].get(kind, 0)
+        summary["classes"][kind] = summary["classes"].get(kind, 0) + 1
+        summary["count"] += 1
+        memory_type = m.get("memory_type") or "unknown"
+        summary["memory_types"][memory_type] = summary["memory_types"].get(memory_type, 0) + 1
+        summary["confidence_total"] += float(m.get("confidence") or 0.0)
+        summary["revision_heads"][self.revision_roots[m["memory_id"]]] = m["memory_id"]
+        latest = summary["latest"]
+        created_at = m.get("created_at") or ""
+        if latest is None or created_at >= latest["created_at"]:
+            summary["latest"] = {"memory_id": m["memory_id"], "created_at": created_at, "content": m["content"]}
+
+    def topic_summary(self, topic: str) -> Optional[Dict[str, Any]]:
+        summary = self.topic_summaries.get(topic.lower())
+        if summary is None:
+            return None
+        return {
+            "topic": topic.lower(),
+            "count": summary["count"],
+            "latest": summary["latest"],
+            "memory_types": dict(summary["memory_types"]),
+            "average_confidence": summary["confidence_total"] / summary["count"],
+            "revision_heads": sorted(summary["revision_heads"].values()),
+            "contradictions": summary["contradictions"],
+        }
+
+    def list_topics(
+        self,
+        sort: str = "count",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50,
+        prefix: str = "",
+    ) -> Dict[str, Any]:
+        if sort not in TOPIC_SORT_KEYS:
+            raise ValueError(f"Sort must be one of: {', '.join(TOPIC_SORT_KEYS)}.")
+        prefix = prefix.lower()
+        rows = [self.topic_summary(t) for t in self.topic_summaries if t.startswith(prefix)]
+        keys = {
+            "count": lambda r: (r["count"], r["topic"]),
+            "latest": lambda r: (r["latest"]["created_at"], r["topic"]),
+            "topic": lambda r: r["topic"],
+            "confidence": lambda r: (r["average_confidence"], r["topic"]),
+            "contradictions": lambda r: (r["contradictions"], r["topic"]),
+        }
+        rows.sort(key=keys[sort], reverse=descending)
+        return {
+            "topics": rows[offset : offset + limit],
+            "total": len(rows),
+            "offset": offset,
+            "limit": limit,
+            "sort": sort,
+            "order": "desc" if descending else "asc",
+        }
+
+    def matches_prefix(self, memories: List[Dict[str, Any]], full: bool = True) -> bool:
+        if self.count > len(memories):
+            return False
+        if self.count and memories[self.count - 1]["memory_id"] != self.last_memory_id:
+            return False
+        if not full:
+            return True
+        digest = ""
+        for m in memories[: self.count]:
+            digest = chain_digest(digest, m["memory_id"])
+        return digest == self.digest
+
+    def dedup_index(self, memories: List[Dict[str, Any]]) -> LSHIndex:
+        with _open_indexes_lock:
+            if self.dedup is None:
+                self.dedup = LSHIndex()
+                self.dedup.extend(memories[: self.count])
+                self.unsaved += self.count
+            return self.dedup
+
+    def timeline_positions(self, topic: str = "") -> List[int]:
+        if not topic:
+            return [position for _, position in self.time_order]
+        wanted = set(self.topics.get(topic.lower(), []))
+        return [position for _, position in self.time_order if position in wanted]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "count": self.count,
+            "digest": self.digest,
+            "last_memory_id": self.last_memory_id,
+            "generation": self.generation,
+            "topics": self.topics,
+            "time_order": self.time_order,
+            "revision_roots": self.revision_roots,
+            "topic_summaries": self.topic_summaries,
+            "dedup": self.dedup.signatures if self.dedup is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoreIndex":
+        index = cls()
+        index.count = data["count"]
+        index.digest = data["digest"]
+        index.last_memory_id = data.get("last_memory_id")
+        index.generation = data.get("generation") or ""
+        index.topics = data["topics"]
+        index.time_order = [(created_at, position) for created_at, position in data["time_order"]]
+        index.revision_roots = data["revision_roots"]
+        index.topic_summaries = data["topic_summaries"]
+        if data.get("dedup") is not None:
+            index.dedup = LSHIndex()
+            for memory_id, signature in data["dedup"].items():
+                index.dedup.add(memory_id, signature)
+        return index
+
+
+def load_index(store_path: str) -> Optional[StoreIndex]:
+    path = index_path(store_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return StoreIndex.from_dict(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_index(store_path: str, index: StoreIndex) -> None:
+    path = index_path(store_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    index.unsaved = 0
+
+
+def open_index(
+    store_path: str,
+    memories: Optional[List[Dict[str, Any]]] = None,
+    persist: bool = True,
+) -> StoreIndex:
+    with _open_indexes_lock:
+        current = store_generation(store_path)
+        index = _open_indexes.get(store_path)
+        if index is not None and index.generation == current and (memories is None or len(memories) <= index.count):
+            return index
+        if memories is None or cached_generation(store_path, memories) != current:
+            generation, memories = load_memories_snapshot(store_path)
+        else:
+            generation = current
+        trusted = index is not None
+        if index is None:
+            index = load_index(store_path)
+        rebuilt = False
+        if index is None or not (index.generation == generation and index.count == len(memories)):
+            if index is None or not index.matches_prefix(memories, full=not trusted):
+                index = StoreIndex()
+                rebuilt = True
+        index.extend(memories[index.count :])
+        index.generation = generation
+        _open_indexes[store_path] = index
+        if persist and (rebuilt or index.unsaved >= SAVE_EVERY) and memories:
+            save_index(store_path, index)
+        return index
+
+
+def list_topics(
+    store_path: str,
+    sort: str = "count",
+    descending: bool = True,
+    offset: int = 0,
+    limit: int = 50,
+    prefix: str = "",
+) -> Dict[str, Any]:
+    with _open_indexes_lock:
+        index = open_index(store_path)
+        return index.list_topics(sort=sort, descending=descending, offset=offset, limit=limit, prefix=prefix)
+
+
+def topic_summary(
+    store_path: str,
+    topic: str,
+    memories: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[Dict[str, Any]]:
+    with _open_indexes_lock:
+        return open_index(store_path, memories).topic_summary(topic)
+
+
+def indexed_timeline(
+    store_path: str,
+    topic: str = "",
+    memories: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    with _open_indexes_lock:
+        if memories is None:
+            memories = load_memories_cached(store_path)
+        positions = open_index(store_path, memories).timeline_positions(topic)
+    return [memories[p] for p in positions if p < len(memories)]
+
+
+def dedup_index(store_path: str, memories: List[Dict[str, Any]]) -> LSHIndex:
+    with _open_indexes_lock:
+        return open_index(store_path, memories).dedup_index(memories)
@@ -1,17 +1,55 @@
+import gzip
+import json
 import os
+import socket
 import sys
+import tempfile
+import threading
+import time
 from datetime import datetime, timedelta
 
 root_dir = os.path.dirname(os.path.dirname(__file__))
 if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
 
-from mnemosyne_engine import answer_query
-from memory_pipeline import run_memory_pipeline
-from memory_store import save_memories, load_memories, snapshot_memories
-from mnemosyne_app import run_ingest, run_answer
-from thinking_sessions import run_thinking_session
+from mnemosyne_engine import answer_query, answer_query_structured, stream_answer_query
+from memory_pipeline import run_memory_pipeline, group_contradictions
+from memory_store import (
+    save_memories,
+    load_memories,
+    load_memories_cached,
+    store_lock,
+    load_memories_pruned,
+    snapshot_memories,
+    append_memories,
+    partition_memories,
+)
+from partitioned_store import load_manifest
+from bulk_io import export_memories, import_memories
+import store_index
+import metrics
+from profiling import RequestProfiler, profile_requested
+from change_feed import changes_path, read_changes, wait_for_changes, parse_cursor
+from replica import StoreReplica
+from mnemosyne_app import run_ingest, run_answer, run_answer_batch
+from thinking_sessions import run_thinking_session, run_thinking_session_batch
 from analytics import build_belief_graph, build_timeline
+from ingest_queue import IngestQueue
+from http.server import ThreadingHTTPServer
+from api_server import (
+    MnemosyneHandler,
+    choose_encoding,
+    compressor_for,
+    decompress_body,
+    compute_etag,
+    etag_matches,
+    request_workers,
+    long_poll_timeout,
+    endpoint_label,
+    MAX_REQUEST_WORKERS,
+    LONG_POLL_SECONDS,
+    MAX_LONG_POLL_SECONDS,
+)
 
 
 def build_memory(
@@ -93,6 +131,25 @@ def test_empty_memories():
     assert "I don’t have enough memory to answer this confidently." in output
 
 
+def test_structured_and_streaming_answer():
+    now = datetime.now()
+    earlier = now - timedelta(days=3)
+    memories = [
+        build_memory("m1", "Initial view on gamma.", earlier, topic=["gamma"], confidence=0.9),
+        build_memory("m2", "Updated view on gamma.", now, topic=["gamma"], revision_of="m1", confidence=0.7),
+    ]
+    question = "How has my thinking on gamma evolved?"
+    result = answer_query_structured(memories, question)
+    assert result["mode"] == "present"
+    assert [line["memory_id"] for line in result["answer"]["lines"]] == ["m1", "m2"]
+    assert result["belief_evolution"][0]["chain"] == ["m1", "m2"]
+    assert result["memories_used"][1]["confidence"] == 0.7
+    assert result["confidence"]["level"] == "high"
+    chunks = list(stream_answer_query(memories, question))
+    assert len(chunks) > 1
+    assert "".join(chunks) == answer_query(memories, question)
+
+
 def test_memory_pipeline_extraction():
     now = datetime.now().isoformat()
     raw = "I believe RAG is the future of personal AI. I decided to invest more time into it."
@@ -130,6 +187,38 @@ def test_memory_pipeline_revision_and_contradiction():
     assert len(contradictions) >= 1
 
 
+def test_memory_pipeline_near_duplicates(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    ts = datetime.now().isoformat()
+    existing = run_memory_pipeline("I believe RAG is the future of personal AI.", ts, "note", [])["new_memories"]
+    raw = "I believe RAG is the future of personal AI! I decided to invest in agents."
+    flagged = run_memory_pipeline(raw, ts, "chat", existing, dedup="flag")
+    assert len(flagged["new_memories"]) == 2
+    assert flagged["dedup"]["flagged"] == 1
+    assert flagged["near_duplicates"][0]["duplicate_of"] == existing[0]["memory_id"]
+    merged = run_memory_pipeline(raw, ts, "chat", existing, dedup="merge")
+    assert len(merged["new_memories"]) == 1
+    assert merged["near_duplicates"][0]["action"] == "merged"
+    assert merged["merges"][0]["memory_id"] == existing[0]["memory_id"]
+    store_path = os.path.join(tmp_path, "merge_store.json")
+    save_memories(store_path, existing)
+    append_memories(store_path, merged["new_memories"], merges=merged["merges"])
+    stored = load_memories(store_path)
+    assert len(stored) == 2
+    assert stored[0]["merged_from"][0]["memory_id"] == merged["near_duplicates"][0]["memory_id"]
+    assert stored[0]["merged_from"][0]["source"] == "chat"
+    events, _ = read_changes(store_path, 0)
+    assert [e["type"] for e in events] == ["memory", "merge"]
+    skipped = run_memory_pipeline(raw + " I decided to invest in agents.", ts, "chat", existing, dedup="skip")
+    assert len(skipped["new_memories"]) == 1
+    assert skipped["dedup"]["skipped"] == 2
+    assert skipped["near_duplicates"] == []
+    plain = run_memory_pipeline(raw, ts, "chat", existing)
+    assert len(plain["new_memories"]) == 2
+    assert plain["dedup"]["policy"] == "off"
+
+
 def test_memory_store_roundtrip(tmp_path=None):
     if tmp_path is None:
         base_dir = os.path.dirname(__file__)
@@ -177,6 +266,29 @@ def test_thinking_session(tmp_path=None):
     assert "Thinking session summary for topic" in session_result["summary_memory"]["content"]
 
 
+def test_thinking_session_batch(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "batch_store.json")
+    now = datetime.now()
+    memories = [
+        build_memory("m1", "Belief about rag.", now - timedelta(days=5), topic=["rag"]),
+        build_memory("m2", "Belief about agents.", now, topic=["agents"]),
+        build_memory("m3", "Belief about search.", now, topic=["search"]),
+    ]
+    save_memories(store_path, memories)
+    result = run_thinking_session_batch(["rag", "agents"], store_path)
+    assert [s["topic"] for s in result["sessions"]] == ["rag", "agents"]
+    assert "Belief about rag." in result["sessions"][0]["answer"]
+    assert "Belief about agents." not in result["sessions"][0]["answer"]
+    assert result["total_memories"] == 5
+    since = (now - timedelta(days=1)).isoformat()
+    result = run_thinking_session_batch(None, store_path, since_iso=since)
+    assert [s["topic"] for s in result["sessions"]] == ["agents", "search"]
+    ids = {m["memory_id"] for m in load_memories(store_path)}
+    assert len(ids) == 7
+
+
 def test_analytics_graph_and_timeline(tmp_path=None):
     now = datetime.now()
     memories = [
@@ -223,19 +335,630 @@ def test_app_ingest_and_answer(tmp_path=None):
     assert "RAG" in answer_result["answer"]
 
 
+def test_ingest_queue_replay_and_group_commit(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "queue_store.json")
+    wal_path = os.path.join(tmp_path, "ingest.wal")
+    crashed = IngestQueue(wal_path)
+    first = crashed.submit({"text": "I believe RAG is useful.", "source": "note", "store": store_path})
+    second = crashed.submit({"text": "I decided to build agents.", "source": "chat", "store": store_path})
+    assert crashed.status(first)["status"] == "queued"
+    assert load_memories(store_path) == []
+    queue = IngestQueue(wal_path)
+    queue.start()
+    assert queue.drain(timeout=10)
+    queue.stop()
+    assert queue.status(first)["status"] == "done"
+    assert queue.status(second)["result"]["total_memories"] == 2
+    assert len(load_memories(store_path)) == 2
+    assert all("job_id" not in m for m in load_memories(store_path))
+    assert os.path.getsize(wal_path) == 0
+    interrupted = IngestQueue(wal_path)
+    third = interrupted.submit({"text": "I think memory matters.", "source": "note", "store": store_path})
+    lost = interrupted.submit({"text": "I believe notes help.", "source": "note", "store": store_path})
+    committed = build_memory("m-committed", "I think memory matters.", datetime.now(), topic=["memory"])
+    interrupted._write_wal(
+        [
+            {"op": "commit", "job_id": third, "memory_ids": ["m-committed"]},
+            {"op": "commit", "job_id": lost, "memory_ids": ["m-never-written"]},
+        ]
+    )
+    append_memories(store_path, [committed])
+    recovered = IngestQueue(wal_path)
+    recovered.start()
+    assert recovered.drain(timeout=10)
+    recovered.stop()
+    assert recovered.status(third)["status"] == "done"
+    assert "result" in recovered.status(lost)
+    assert len(load_memories(store_path)) == 4
+    jobs_dir = os.path.join(tmp_path, "jobs")
+    worker = IngestQueue(wal_path + ".0", jobs_dir=jobs_dir)
+    other = IngestQueue(wal_path + ".1", jobs_dir=jobs_dir)
+    shared = worker.submit({"text": "I decided to write more.", "source": "note", "store": store_path})
+    assert other.status(shared)["status"] == "queued"
+    worker.start()
+    assert worker.drain(timeout=10)
+    worker.stop()
+    assert other.status(shared)["result"]["total_memories"] == 5
+    assert other.status("../" + shared) is None
+    dedup_store = os.path.join(tmp_path, "queue_dedup_store.json")
+    deduped = IngestQueue(wal_path + ".dedup")
+    text = "I believe RAG is the future of personal AI."
+    jobs = [deduped.submit({"text": text, "source": "note", "store": dedup_store, "dedup": "skip"}) for _ in range(2)]
+    deduped.start()
+    assert deduped.drain(timeout=10)
+    deduped.stop()
+    assert deduped.status(jobs[1])["result"]["dedup"]["skipped"] == 1
+    assert store_index.open_index(dedup_store).count == len(load_memories(dedup_store)) == 1
+    conflict_store = os.path.join(tmp_path, "queue_conflict_store.json")
+    run_ingest("I believe RAG is useful.", "note", "2025-05-01T10:00:00", conflict_store)
+    run_ingest("I do not think RAG is useful.", "note", "2025-05-02T10:00:00", conflict_store)
+    conflicted = IngestQueue(wal_path + ".conflict")
+    unrelated = conflicted.submit({"text": "I decided to build agents.", "source": "note", "store": conflict_store})
+    related = conflicted.submit({"text": "I believe RAG is not useful.", "source": "note", "store": conflict_store})
+    conflicted.start()
+    assert conflicted.drain(timeout=10)
+    conflicted.stop()
+    assert conflicted.status(unrelated)["result"]["contradictions"] == []
+    related_ids = {m["memory_id"] for m in conflicted.status(related)["result"]["new_memories"]}
+    contradictions = conflicted.status(related)["result"]["contradictions"]
+    assert contradictions
+    for c in contradictions:
+        assert related_ids & {x["memory_id"] for x in c["conflicting_memories"]}
+
+
+def test_http_compression_negotiation():
+    assert choose_encoding(None) is None
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate;q=0.5") == "deflate"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*;q=0.1") == "gzip"
+    payload = b'{"text": "I believe RAG is the future."}' * 50
+    compressor = compressor_for("gzip")
+    body = compressor.compress(payload) + compressor.flush()
+    assert gzip.decompress(body) == payload
+    assert decompress_body(body, "gzip") == payload
+    compressor = compressor_for("deflate")
+    assert decompress_body(compressor.compress(payload) + compressor.flush(), "deflate") == payload
+
+
+def test_long_poll_timeout_is_finite():
+    assert long_poll_timeout(None) == LONG_POLL_SECONDS
+    assert long_poll_timeout("2.5") == 2.5
+    assert long_poll_timeout("-3") == 0.0
+    assert long_poll_timeout("1e9") == MAX_LONG_POLL_SECONDS
+    for value in ["nan", "NaN", "inf", "-inf", "soon"]:
+        try:
+            long_poll_timeout(value)
+        except ValueError:
+            continue
+        raise AssertionError(value)
+
+
+def test_request_workers_are_capped():
+    assert request_workers(None) == 0
+    assert request_workers("2") == min(2, MAX_REQUEST_WORKERS)
+    assert request_workers(10 ** 6) == MAX_REQUEST_WORKERS
+    assert request_workers(-5) == 0
+
+
+def _raw_http(port, request):
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(request)
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+    head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    return lines[0], [line.lower() for line in lines[1:]], body
+
+
+def test_streamed_answer_status_line(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "stream_store.json")
+    save_memories(store_path, [build_memory("m1", "I believe RAG is useful.", datetime.now(), topic=["rag"])])
+
+    class QuietHandler(MnemosyneHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        body = json.dumps({"question": "What do I think about RAG?", "store": store_path, "stream": True})
+        for version in ["HTTP/1.1", "HTTP/1.0"]:
+            request = (
+                f"POST /answer {version}\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n{body}"
+            ).encode("utf-8")
+            status, headers, payload = _raw_http(server.server_port, request)
+            chunked = "transfer-encoding: chunked" in headers
+            if version == "HTTP/1.1":
+                assert status == "HTTP/1.1 200 OK" and chunked
+                assert payload.endswith(b"0\r\n\r\n")
+            else:
+                assert status.startswith("HTTP/1.0 200") and not chunked
+                assert b"RAG" in payload
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_snapshot_cursor_resumes_changes(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "snapshot_store.json")
+    run_ingest("I believe RAG is useful.", "note", "2025-05-01T10:00:00", store_path)
+
+    class QuietHandler(MnemosyneHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        body = json.dumps({"store": store_path, "topic": "rag"})
+        request = (
+            f"POST /timeline HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n{body}"
+        ).encode("utf-8")
+        _, _, payload = _raw_http(server.server_port, request)
+        snapshot = json.loads(payload)
+        assert snapshot["cursor"] == parse_cursor("end", store_path)
+        second = run_ingest("I do not think RAG is useful.", "note", "2025-05-02T10:00:00", store_path)
+        query = f"store={store_path}&cursor=0&timeout=1"
+        request = (
+            f"GET /changes?{query} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Last-Event-ID: {snapshot['cursor']}\r\nConnection: close\r\n\r\n"
+        ).encode("utf-8")
+        _, _, payload = _raw_http(server.server_port, request)
+        events = json.loads(payload)["events"]
+        assert events[0]["memory"]["memory_id"] == second["new_memories"][0]["memory_id"]
+        for timeout in ["nan", "inf", "soon"]:
+            request = (
+                f"GET /changes?store={store_path}&timeout={timeout} HTTP/1.1\r\nHost: localhost\r\n"
+                f"Connection: close\r\n\r\n"
+            ).encode("utf-8")
+            status, _, _ = _raw_http(server.server_port, request)
+            assert status.endswith("400 Bad Request")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_etag_follows_store_generation(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "etag_store.json")
+    now = datetime.now()
+    save_memories(store_path, [build_memory("m1", "Belief about rag.", now, topic=["rag"])])
+    params = {"store": store_path, "topic": "rag"}
+    etag = compute_etag(store_path, "/timeline", params)
+    assert etag == compute_etag(store_path, "/timeline", dict(params))
+    assert etag != compute_etag(store_path, "/graph", params)
+    assert etag != compute_etag(store_path, "/timeline", {"store": store_path, "topic": "ai"})
+    assert etag_matches(etag, etag)
+    assert etag_matches('"other", ' + etag[2:], etag)
+    assert not etag_matches(None, etag)
+    append_memories(store_path, [build_memory("m2", "Updated belief about rag.", now, topic=["rag"])])
+    assert not etag_matches(etag, compute_etag(store_path, "/timeline", params))
+
+
+def test_partitioned_store_pruning(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    source_path = os.path.join(tmp_path, "flat_store.json")
+    store_dir = os.path.join(tmp_path, "partitioned")
+    memories = [
+        build_memory("m1", "Old belief about rag.", datetime(2025, 1, 10), topic=["rag"]),
+        build_memory("m2", "Belief about agents.", datetime(2025, 2, 10), topic=["agents"]),
+        build_memory("m3", "New belief about rag.", datetime(2025, 3, 10), topic=["rag"], revision_of="m1"),
+    ]
+    save_memories(source_path, memories)
+    result = partition_memories(source_path, store_dir, keep_hot=1)
+    assert result["compressed_partitions"] == ["2025-01", "2025-02"]
+    manifest = load_manifest(store_dir)
+    assert manifest["partitions"]["2025-01"]["file"] == "2025-01.json.gz"
+    assert manifest["partitions"]["2025-03"]["topics"] == ["rag"]
+    assert [m["memory_id"] for m in load_memories(store_dir)] == ["m1", "m2", "m3"]
+    pruned = load_memories_pruned(store_dir, end_iso="2025-01-31T00:00:00")
+    assert [m["memory_id"] for m in pruned] == ["m1"]
+    pruned = load_memories_pruned(store_dir, topic="agents")
+    assert [m["memory_id"] for m in pruned] == ["m2"]
+    combined = append_memories(store_dir, [build_memory("m4", "Late note on agents.", datetime(2025, 2, 20), topic=["agents"])])
+    assert len(combined) == 4
+    assert load_manifest(store_dir)["partitions"]["2025-02"]["count"] == 2
+    answer = run_answer("What did I believe about rag as of 2025-02-01?", store_dir)
+    assert "Old belief about rag." in answer["answer"]
+    assert "New belief about rag." not in answer["answer"]
+
+
+def test_bulk_export_and_import(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "bulk_store.json")
+    export_path = os.path.join(tmp_path, "export.jsonl")
+    target_path = os.path.join(tmp_path, "bulk_target.json")
+    memories = [
+        build_memory("m1", "Belief about rag.", datetime(2025, 1, 10), topic=["rag"]),
+        build_memory("m2", "Belief about agents.", datetime(2025, 2, 10), topic=["agents"]),
+        build_memory("m3", "Later belief about rag.", datetime(2025, 3, 10), topic=["rag"]),
+    ]
+    save_memories(store_path, memories)
+    report = export_memories(store_path, export_path, topic="rag")
+    assert report["read"] == 3
+    assert report["written"] == 2
+    with open(export_path, "a", encoding="utf-8") as f:
+        f.write('{"memory_id": "bad", "content": "x"}\n')
+    save_memories(target_path, [memories[1]])
+    report = import_memories(export_path, target_path, start_iso="2025-02-01T00:00:00")
+    assert report["read"] == 3
+    assert report["written"] == 1
+    assert report["invalid"] == 1
+    assert report["errors"][0]["memory_id"] == "bad"
+    assert report["memories_per_second"] > 0
+    assert [m["memory_id"] for m in load_memories(target_path)] == ["m2", "m3"]
+    partitioned_path = os.path.join(tmp_path, "bulk_partitioned")
+    partition_memories(store_path, partitioned_path)
+    report = import_memories(export_path, partitioned_path, batch_size=1)
+    assert report["written"] == 2
+    assert sorted(m["memory_id"] for m in load_memories(partitioned_path)) == ["m1", "m1", "m2", "m3", "m3"]
+
+
+def test_store_lock_and_cached_reload(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "locked_store.json")
+    now = datetime.now()
+    save_memories(store_path, [build_memory("m1", "Belief about locks.", now, topic=["locks"])])
+    first = load_memories_cached(store_path)
+    assert load_memories_cached(store_path) is first
+    with store_lock(store_path):
+        with store_lock(store_path):
+            append_memories(store_path, [build_memory("m2", "Another belief.", now, topic=["locks"])])
+    reloaded = load_memories_cached(store_path)
+    assert reloaded is not first
+    assert [m["memory_id"] for m in reloaded] == ["m1", "m2"]
+    assert sorted(os.listdir(tmp_path)) == [
+        "locked_store.json",
+        "locked_store.json.changes.jsonl",
+        "locked_store.json.lock",
+    ]
+
+
+def test_answer_batch(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "answer_batch_store.json")
+    memories = [
+        build_memory("m1", "Earlier belief about beta.", datetime(2025, 1, 10), topic=["beta"]),
+        build_memory("m2", "Newer belief about beta.", datetime(2025, 3, 10), topic=["beta"]),
+    ]
+    save_memories(store_path, memories)
+    questions = [
+        "What did I believe about beta as of 2025-02-01?",
+        "What do I currently believe about beta?",
+        "What did I think about beta as of 2025-02-01?",
+    ]
+    for workers in [0, 2]:
+        result = run_answer_batch(questions, store_path, workers=workers)
+        assert [r["question"] for r in result["results"]] == questions
+        for question, item in zip(questions, result["results"]):
+            assert item["answer"] == answer_query(memories, question)
+            assert item["seconds"] >= 0
+    structured = run_answer_batch(questions[:1], store_path, output_format="json")
+    assert structured["results"][0]["result"]["mode"] == "past"
+    held = []
+    with metrics._lock:
+        worker = threading.Thread(target=lambda: held.append(run_answer_batch(questions, store_path, workers=2)), daemon=True)
+        worker.start()
+        worker.join(60)
+        assert not worker.is_alive()
+    assert len(held[0]["results"]) == len(questions)
+
+
+def test_store_index_warm_start(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "indexed_store.json")
+    memories = [
+        build_memory("m1", "Belief about rag.", datetime(2025, 3, 10), topic=["rag"]),
+        build_memory("m2", "Belief about agents.", datetime(2025, 1, 10), topic=["agents"]),
+        build_memory("m3", "Updated belief about rag.", datetime(2025, 4, 10), topic=["RAG"], revision_of="m1"),
+    ]
+    save_memories(store_path, memories)
+    index = store_index.open_index(store_path)
+    index.dedup_index(memories)
+    store_index.save_index(store_path, index)
+    assert os.path.exists(store_index.index_path(store_path))
+    assert index.timeline_positions() == [1, 0, 2]
+    assert index.timeline_positions("rag") == [0, 2]
+    assert index.revision_roots["m3"] == "m1"
+    append_memories(store_path, [build_memory("m4", "Belief about search.", datetime(2025, 2, 10), topic=["search"])])
+    store_index._open_indexes.clear()
+    warm = store_index.open_index(store_path)
+    assert warm.count == 4
+    assert warm.dedup is not None and "m4" in warm.dedup.signatures
+    assert warm.timeline_positions() == [1, 3, 0, 2]
+    save_memories(store_path, list(reversed(load_memories(store_path))))
+    store_index._open_indexes.clear()
+    rebuilt = store_index.open_index(store_path)
+    assert rebuilt.count == 4
+    assert rebuilt.dedup is None
+    assert rebuilt.timeline_positions("rag") == [3, 1]
+    shuffled = [
+        build_memory(f"s{i}", "Belief about rag.", datetime(2025, 1, 1) + timedelta(days=(i * 37) % 101), topic=["rag"])
+        for i in range(store_index.INSORT_LIMIT * 2)
+    ]
+    bulk = store_index.StoreIndex()
+    bulk.extend(shuffled)
+    incremental = store_index.StoreIndex()
+    for m in shuffled:
+        incremental.extend([m])
+    assert bulk.time_order == incremental.time_order
+
+
+def test_open_index_ignores_stale_snapshots(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "stale_store.json")
+    save_memories(store_path, [build_memory("m1", "Belief about rag.", datetime(2025, 1, 10), topic=["rag"])])
+    stale = load_memories_cached(store_path)
+    assert store_index.open_index(store_path, stale).count == 1
+    combined = append_memories(store_path, [build_memory("m2", "Belief about agents.", datetime(2025, 2, 10), topic=["agents"])])
+    store_index.open_index(store_path, combined)
+    assert [m["memory_id"] for m in store_index.indexed_timeline(store_path, "", memories=stale)] == ["m1"]
+    assert store_index.open_index(store_path).count == 2
+    assert store_index.list_topics(store_path)["total"] == 2
+    stale = load_memories_cached(store_path)
+    save_memories(store_path, stale + [build_memory("m3", "Belief about search.", datetime(2025, 3, 10), topic=["search"])])
+    assert len(store_index.indexed_timeline(store_path, "", memories=stale)) == 2
+    assert store_index.open_index(store_path).count == 3
+    assert store_index.topic_summary(store_path, "search", stale)["count"] == 1
+
+
+def test_concurrent_timeline_reads(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "concurrent_store.json")
+    save_memories(store_path, [])
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                items = store_index.indexed_timeline(store_path, "rag")
+                created = [m["created_at"] for m in items]
+                assert created == sorted(created)
+            except Exception as exc:
+                errors.append(exc)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for batch in range(5):
+            memories = [
+                build_memory(f"c{batch}-{i}", "Belief about rag.", datetime(2025, 1, 1) + timedelta(days=(i * 37) % 101), topic=["rag"])
+                for i in range(store_index.INSORT_LIMIT * 2)
+            ]
+            combined = append_memories(store_path, memories)
+            store_index.open_index(store_path, combined)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    assert len(store_index.indexed_timeline(store_path, "rag")) == store_index.INSORT_LIMIT * 10
+
+
+def test_metrics_and_timings(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "metrics_store.json")
+    metrics.reset()
+    summary = run_ingest(
+        "I believe RAG is useful. I do not think RAG is useful.",
+        "note",
+        "2025-05-01T10:00:00",
+        store_path,
+        timings=True,
+    )
+    timings = summary["timings"]
+    for stage in ["load_memories", "extract_new_memories", "link_revisions", "group_contradictions", "save_memories"]:
+        assert stage in timings["stages"]
+    assert timings["counters"]["pairs_compared"]["group_contradictions"] == 1
+    assert timings["total_seconds"] >= timings["stages"]["group_contradictions"]["seconds"]
+    result = run_answer("What do I believe about RAG?", store_path, timings=True)
+    assert "parse_memories" in result["timings"]["stages"]
+    assert "format_answer" in result["timings"]["stages"]
+    assert "timings" not in run_answer("What do I believe about RAG?", store_path)
+    text = metrics.render_prometheus({"http_requests": {"endpoint": {"/answer": 3}}})
+    assert '# TYPE mnemosyne_stage_seconds histogram' in text
+    assert 'mnemosyne_stage_seconds_count{stage="group_contradictions"} 1' in text
+    assert 'mnemosyne_stage_seconds_bucket{stage="parse_memories",le="+Inf"} 2' in text
+    assert 'mnemosyne_pairs_compared_total{stage="group_contradictions"} 1' in text
+    assert 'mnemosyne_http_requests_total{endpoint="/answer"} 3' in text
+    assert endpoint_label("/answer?profile=1") == "/answer"
+    assert endpoint_label("/jobs/abc") == "/jobs"
+    assert endpoint_label("/wp-admin/setup.php") == "other"
+
+
+def test_profiling_hook(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    assert profile_requested("1", "/answer")
+    assert profile_requested(None, "/answer?profile=1")
+    assert profile_requested(None, "/graph?x=2&profile=true")
+    assert not profile_requested(None, "/answer")
+    assert not profile_requested("0", "/answer?profile=0")
+    output_dir = os.path.join(tmp_path, "profiles")
+    profiler = RequestProfiler(output_dir=output_dir, min_interval=60.0, top=5)
+    active, error = profiler.start()
+    assert active is not None and error is None
+    memories = [
+        build_memory(
+            f"m{i}",
+            f"I believe topic {i % 3} is {'not ' if i % 2 else ''}useful.",
+            datetime(2025, 1, 1) + timedelta(days=i),
+            topic=[f"topic{i % 3}"],
+        )
+        for i in range(30)
+    ]
+    group_contradictions(memories)
+    report = profiler.finish(active, "test-profile", "test")
+    assert len(report["functions"]) <= 5
+    assert any("group_contradictions" in row["function"] for row in report["functions"])
+    assert os.path.exists(os.path.join(output_dir, "test-profile.prof"))
+    assert os.path.exists(os.path.join(output_dir, "test-profile.json"))
+    blocked, error = profiler.start()
+    assert blocked is None and "rate limit" in error
+
+
+def test_change_feed(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "feed_store.json")
+    assert parse_cursor(None, store_path) == 0
+    first = run_ingest("I believe RAG is useful.", "note", "2025-05-01T10:00:00", store_path)
+    cursor = parse_cursor("end", store_path)
+    assert cursor > 0
+    second = run_ingest("I do not think RAG is useful.", "note", "2025-05-02T10:00:00", store_path)
+    events, next_cursor = read_changes(store_path, cursor)
+    assert [e["type"] for e in events] == ["memory", "revision", "contradiction"]
+    assert events[0]["memory"]["memory_id"] == second["new_memories"][0]["memory_id"]
+    assert events[1]["revision_of"] == first["new_memories"][0]["memory_id"]
+    assert events[-1]["cursor"] == next_cursor
+    all_events, _ = read_changes(store_path, 0)
+    assert len(all_events) == 4
+    assert read_changes(store_path, next_cursor) == ([], next_cursor)
+    assert wait_for_changes(store_path, next_cursor, timeout=0.05) == ([], next_cursor)
+    reset, reset_cursor = read_changes(store_path, next_cursor + 100)
+    assert reset[0]["type"] == "reset" and reset_cursor == next_cursor
+    export_path = os.path.join(tmp_path, "feed_export.jsonl")
+    export_memories(store_path, export_path)
+    import_memories(export_path, os.path.join(tmp_path, "feed_copy.json"))
+    copied, _ = read_changes(os.path.join(tmp_path, "feed_copy.json"), 0)
+    assert [e["type"] for e in copied] == ["reset"]
+
+
+def test_store_replica_follows_changes(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "primary_store.json")
+    run_ingest("I believe RAG is useful.", "note", "2025-05-01T10:00:00", store_path)
+    replica = StoreReplica(store_path)
+    replica.bootstrap()
+    assert len(replica.timeline("rag")) == 1
+    generation = replica.generation()
+    run_ingest("I do not think RAG is useful.", "note", "2025-05-02T10:00:00", store_path)
+    assert replica.lag()["replication_lag_bytes"] > 0
+    assert replica.poll(0) == 3
+    assert replica.generation() != generation
+    assert [m["memory_id"] for m in replica.timeline("rag")] == [m["memory_id"] for m in load_memories(store_path)]
+    lag = replica.lag()
+    assert lag["replication_lag_bytes"] == 0 and lag["replication_lag_seconds"] == 0.0
+    assert lag["total_memories"] == 2
+    answer = replica.answer("What do I think about RAG now?")
+    assert answer["has_memories"] and "not" in answer["answer"]
+    export_path = os.path.join(tmp_path, "primary_export.jsonl")
+    export_memories(store_path, export_path)
+    import_memories(export_path, store_path)
+    replica.poll(0)
+    assert replica.reloads == 2
+    assert replica.lag()["total_memories"] == len(load_memories(store_path))
+    assert replica.lag()["healthy"] and replica.lag()["failures"] == 0
+    replica.poll_interval = 0.01
+    replica.start()
+    try:
+        with open(changes_path(store_path), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "memory", "committed_at": "2025-05-03T10:00:00"}) + "\n")
+        deadline = time.monotonic() + 5
+        while replica.reloads < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        lag = replica.lag()
+        assert lag["failures"] == 1 and "KeyError" in lag["last_error"]
+        assert lag["healthy"] and lag["replication_lag_bytes"] == 0
+        run_ingest("I believe RAG is essential.", "note", "2025-05-04T10:00:00", store_path)
+        while replica.lag()["replication_lag_bytes"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert replica.lag()["total_memories"] == len(load_memories(store_path))
+    finally:
+        replica.stop()
+
+
+def test_topic_summaries(tmp_path=None):
+    if tmp_path is None:
+        tmp_path = tempfile.mkdtemp()
+    store_path = os.path.join(tmp_path, "topics_store.json")
+    first = run_ingest("I believe RAG is useful.", "note", "2025-05-01T10:00:00", store_path)
+    second = run_ingest("I do not think RAG is useful.", "note", "2025-05-02T10:00:00", store_path)
+    summary = store_index.topic_summary(store_path, "RAG")
+    assert summary["count"] == 2
+    assert summary["latest"]["memory_id"] == second["new_memories"][0]["memory_id"]
+    assert summary["revision_heads"] == [second["new_memories"][0]["memory_id"]]
+    assert summary["contradictions"] == 1
+    assert sum(summary["memory_types"].values()) == 2
+    memories = load_memories(store_path)
+    expected = sum(m["confidence"] for m in memories) / 2
+    assert abs(summary["average_confidence"] - expected) < 1e-9
+    page = store_index.list_topics(store_path, sort="topic", descending=False, offset=0, limit=1)
+    assert page["total"] == len(store_index.open_index(store_path).topics)
+    assert len(page["topics"]) == 1 and page["topics"][0]["topic"] == min(store_index.open_index(store_path).topics)
+    reloaded = store_index.load_index(store_path)
+    rebuilt = store_index.StoreIndex()
+    rebuilt.extend(memories[: reloaded.count])
+    assert reloaded.topic_summaries == rebuilt.topic_summaries
+    assert first["new_memories"][0]["memory_id"] not in summary["revision_heads"]
+    session = run_thinking_session("rag", store_path)
+    assert session["overview"] == summary
+    again = run_thinking_session("rag", store_path)
+    assert again["overview"] == summary
+    assert len(load_memories(store_path)) == 4
+
+
 def run_all():
     test_simple_present_answer()
     test_past_filtering()
     test_revision_chain_detection()
     test_no_relevant_memories()
     test_empty_memories()
+    test_structured_and_streaming_answer()
     test_memory_pipeline_extraction()
     test_memory_pipeline_revision_and_contradiction()
+    test_memory_pipeline_near_duplicates()
     test_memory_store_roundtrip()
     test_app_ingest_and_answer()
     test_snapshot_memories()
     test_thinking_session()
+    test_thinking_session_batch()
     test_analytics_graph_and_timeline()
+    test_ingest_queue_replay_and_group_commit()
+    test_http_compression_negotiation()
+    test_request_workers_are_capped()
+    test_long_poll_timeout_is_finite()
+    test_streamed_answer_status_line()
+    test_snapshot_cursor_resumes_changes()
+    test_etag_follows_store_generation()
+    test_partitioned_store_pruning()
+    test_bulk_export_and_import()
+    test_store_lock_and_cached_reload()
+    test_answer_batch()
+    test_store_index_warm_start()
+    test_open_index_ignores_stale_snapshots()
+    test_concurrent_timeline_reads()
+    test_metrics_and_timings()
+    test_profiling_hook()
+    test_change_feed()
+    test_store_replica_follows_changes()
+    test_topic_summaries()
     print("All tests passed.")
 
 
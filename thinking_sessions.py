@@ -1,28 +1,39 @@
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 
-from memory_store import load_memories, append_memories, filter_by_topic, filter_by_time_range
-from mnemosyne_engine import answer_query
+from memory_store import (
+    load_memories_pruned,
+    append_memories,
+    filter_by_topic,
+    filter_by_time_range,
+    build_topic_index,
+    lookup_topic,
+)
+from mnemosyne_engine import answer_query, worker_pool
+from store_index import topic_summary
 
 
-def run_thinking_session(
-    topic: str,
-    store_path: str,
-    start_iso: Optional[str] = None,
-    end_iso: Optional[str] = None,
-) -> Dict[str, Any]:
-    memories = load_memories(store_path)
-    topic_memories = filter_by_topic(memories, topic)
+def _apply_session_window(
+    topic_memories: List[Dict[str, Any]],
+    start_iso: Optional[str],
+    end_iso: Optional[str],
+) -> List[Dict[str, Any]]:
     if start_iso or end_iso:
         if start_iso is None:
             start_iso = "0001-01-01T00:00:00"
         if end_iso is None:
             end_iso = "9999-12-31T23:59:59"
         topic_memories = filter_by_time_range(topic_memories, start_iso, end_iso)
-    answer = answer_query(topic_memories, f"How has my thinking about {topic} evolved?")
-    now = datetime.utcnow().isoformat()
-    summary_memory = {
-        "memory_id": f"session-{now}",
+    return topic_memories
+
+
+def _session_question(topic: str) -> str:
+    return f"How has my thinking about {topic} evolved?"
+
+
+def _build_summary_memory(topic: str, now: str, memory_id: str) -> Dict[str, Any]:
+    return {
+        "memory_id": memory_id,
         "content": f"Thinking session summary for topic '{topic}' at {now}.",
         "created_at": now,
         "memory_type": "reflection",
@@ -31,6 +42,83 @@ def run_thinking_session(
         "topic": [topic],
         "revision_of": None,
     }
-    append_memories(store_path, [summary_memory])
-    return {"answer": answer, "summary_memory": summary_memory}
 
+
+def _answer_session(job: Tuple[str, List[Dict[str, Any]]]) -> str:
+    topic, topic_memories = job
+    return answer_query(topic_memories, _session_question(topic))
+
+
+def run_thinking_session(
+    topic: str,
+    store_path: str,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+) -> Dict[str, Any]:
+    memories = load_memories_pruned(store_path, start_iso=start_iso, end_iso=end_iso, topic=topic)
+    topic_memories = filter_by_topic(memories, topic)
+    topic_memories = _apply_session_window(topic_memories, start_iso, end_iso)
+    answer = answer_query(topic_memories, _session_question(topic))
+    now = datetime.utcnow().isoformat()
+    summary_memory = _build_summary_memory(topic, now, f"session-{now}")
+    combined = append_memories(store_path, [summary_memory])
+    overview = topic_summary(store_path, topic, combined)
+    return {"answer": answer, "summary_memory": summary_memory, "overview": overview}
+
+
+def topics_with_new_memories(memories: List[Dict[str, Any]], since_iso: str) -> List[str]:
+    topics: List[str] = []
+    seen = set()
+    for m in memories:
+        if m.get("source") == "session":
+            continue
+        created_at = m.get("created_at")
+        if created_at is None or created_at < since_iso:
+            continue
+        for t in m.get("topic", []):
+            lower = str(t).lower()
+            if lower not in seen:
+                seen.add(lower)
+                topics.append(lower)
+    return topics
+
+
+def run_thinking_session_batch(
+    topics: Optional[List[str]],
+    store_path: str,
+    start_iso: Optional[str] = None,
+    end_iso: Optional[str] = None,
+    since_iso: Optional[str] = None,
+    workers: int = 0,
+) -> Dict[str, Any]:
+    if topics:
+        memories = load_memories_pruned(store_path, start_iso=start_iso, end_iso=end_iso)
+    else:
+        lower_bound = min(start_iso, since_iso) if start_iso and since_iso else None
+        memories = load_memories_pruned(store_path, start_iso=lower_bound)
+    if not topics:
+        topics = topics_with_new_memories(memories, since_iso) if since_iso else []
+    index = build_topic_index(memories)
+    jobs: List[Tuple[str, List[Dict[str, Any]]]] = []
+    for topic in topics:
+        topic_memories = lookup_topic(index, memories, topic)
+        jobs.append((topic, _apply_session_window(topic_memories, start_iso, end_iso)))
+    if workers > 1 and len(jobs) > 1:
+        with worker_pool(workers) as pool:
+            answers = list(pool.map(_answer_session, jobs))
+    else:
+        answers = [_answer_session(job) for job in jobs]
+    now = datetime.utcnow().isoformat()
+    sessions: List[Dict[str, Any]] = []
+    summary_memories: List[Dict[str, Any]] = []
+    for topic, answer in zip(topics, answers):
+        summary_memory = _build_summary_memory(topic, now, f"session-{now}-{topic}")
+        summary_memories.append(summary_memory)
+        sessions.append({"topic": topic, "answer": answer, "summary_memory": summary_memory})
+    total = len(memories)
+    if summary_memories:
+        combined = append_memories(store_path, summary_memories)
+        total = len(combined)
+        for session in sessions:
+            session["overview"] = topic_summary(store_path, session["topic"], combined)
+    return {"sessions": sessions, "total_memories": total}